@@ -2,8 +2,9 @@ import stactools.core
 
 from stactools.aafc_landuse.cog import create_cog
 from stactools.aafc_landuse.stac import create_collection, create_item
+from stactools.aafc_landuse.verify import verify_cog
 
-__all__ = ["create_collection", "create_item", "create_cog"]
+__all__ = ["create_collection", "create_item", "create_cog", "verify_cog"]
 
 stactools.core.use_fsspec()
 
@@ -0,0 +1,74 @@
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from stactools.aafc_landuse.block_cache import DecodedBlockCache
+
+# Histogram buckets centered on each uint8 value
+HISTOGRAM_BUCKETS = 256
+# Rows of a cached COG counted at a time, bounding the memory of bincount
+HISTOGRAM_ROWS = 1024
+
+
+def read_window(cog_href: str,
+                window: Window,
+                cache: Optional[DecodedBlockCache] = None,
+                opener: Optional[Callable] = None) -> np.ndarray:
+    """Read a window of land use classes from a COG
+
+    Args:
+        cog_href (str): Path to a COG
+        window (Window): Window to read
+        cache (DecodedBlockCache, optional): Decoded block cache used for
+            zero-copy access to local COGs
+        opener (Callable, optional): rasterio opener used to read the COG
+            when no decoded block cache is given, e.g.
+            `RemoteCogCache.open`
+
+    Returns:
+        np.ndarray: (height, width) uint8 array
+    """
+    if cache is not None:
+        return cache.read_window(cog_href, window)
+    with rasterio.open(cog_href, opener=opener) as dataset:
+        return dataset.read(1, window=window)
+
+
+def compute_histogram(cog_href: str,
+                      cache: Optional[DecodedBlockCache] = None,
+                      opener: Optional[Callable] = None) -> Dict[str, Any]:
+    """Count the pixels of each land use class of a COG
+
+    Args:
+        cog_href (str): Path to a COG
+        cache (DecodedBlockCache, optional): Decoded block cache used for
+            zero-copy access to local COGs
+        opener (Callable, optional): rasterio opener used to read the COG
+            when no decoded block cache is given, e.g.
+            `RemoteCogCache.open`
+
+    Returns:
+        dict: Raster extension histogram with a bucket for each uint8 value
+    """
+    counts = np.zeros(HISTOGRAM_BUCKETS, dtype=np.int64)
+    if cache is not None:
+        # A single cache lookup, then row strips of the memory map
+        array = cache.get(cog_href)
+        for row in range(0, array.shape[0], HISTOGRAM_ROWS):
+            counts += np.bincount(array[row:row + HISTOGRAM_ROWS].ravel(),
+                                  minlength=HISTOGRAM_BUCKETS)
+    else:
+        with rasterio.open(cog_href, opener=opener) as dataset:
+            for _, window in dataset.block_windows(1):
+                data = dataset.read(1, window=window)
+                counts += np.bincount(data.ravel(),
+                                      minlength=HISTOGRAM_BUCKETS)
+
+    return {
+        "count": HISTOGRAM_BUCKETS,
+        "min": -0.5,
+        "max": HISTOGRAM_BUCKETS - 0.5,
+        "buckets": counts.tolist(),
+    }
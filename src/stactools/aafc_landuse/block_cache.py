@@ -0,0 +1,183 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 16 * 1024**3
+
+
+class DecodedBlockCache:
+    """Local cache of decoded COG pixels
+
+    Each COG is decoded once, block by block following its internal tiling,
+    into an uncompressed uint8 .npy sidecar that is memory-mapped on access.
+    Windows are returned as zero-copy views of the memory map. A sidecar is
+    rebuilt when the size or modification time of its COG changes, and the
+    least recently used sidecars are evicted when the cache exceeds
+    `max_bytes`.
+    """
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            cache_dir (str): Directory to store the decoded sidecars
+            max_bytes (int, optional): Maximum size of all sidecars
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._arrays: Dict[str, np.memmap] = {}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, cog_path: str) -> np.memmap:
+        """Get the decoded pixels of the first band of a local COG
+
+        Args:
+            cog_path (str): Path to a local COG
+
+        Returns:
+            np.memmap: Read-only (height, width) uint8 array
+        """
+        if not os.path.isfile(cog_path):
+            raise ValueError(
+                f"Only local COGs may be cached, {cog_path} is not a file")
+
+        key = self._key(cog_path)
+        stat = os.stat(cog_path)
+        metadata = self._read_metadata(key)
+        if (metadata is None or metadata["size"] != stat.st_size
+                or metadata["mtime_ns"] != stat.st_mtime_ns):
+            self._arrays.pop(key, None)
+            self._build(key, cog_path, stat)
+            self.evict(keep=key)
+        else:
+            # Record the access for least recently used eviction
+            os.utime(self._metadata_path(key))
+
+        if key not in self._arrays:
+            self._arrays[key] = np.load(self._array_path(key), mmap_mode="r")
+        return self._arrays[key]
+
+    def read_window(self, cog_path: str, window: Window) -> np.ndarray:
+        """Read a window of the first band of a local COG
+
+        Args:
+            cog_path (str): Path to a local COG
+            window (Window): Window to read
+
+        Returns:
+            np.ndarray: Zero-copy view of the decoded window
+        """
+        (row_start, row_stop), (col_start, col_stop) = window.toranges()
+        return self.get(cog_path)[row_start:row_stop, col_start:col_stop]
+
+    def invalidate(self, cog_path: str):
+        """Remove the sidecar of a COG
+
+        Args:
+            cog_path (str): Path to a local COG
+        """
+        self._remove(self._key(cog_path))
+
+    def size(self) -> int:
+        """Total size of all sidecars in bytes"""
+        return sum(
+            os.path.getsize(os.path.join(self.cache_dir, name))
+            for name in os.listdir(self.cache_dir) if name.endswith(".npy"))
+
+    def evict(self, keep: Optional[str] = None):
+        """Remove the least recently used sidecars until the cache fits
+
+        Args:
+            keep (str, optional): Key of a sidecar that is never evicted
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".npy"):
+                continue
+            key = name[:-4]
+            size = os.path.getsize(self._array_path(key))
+            total += size
+            metadata_path = self._metadata_path(key)
+            accessed = (os.path.getmtime(metadata_path)
+                        if os.path.exists(metadata_path) else 0)
+            entries.append((accessed, key, size))
+
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            logger.debug(f"Evicting decoded block cache entry {key}")
+            self._remove(key)
+            total -= size
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Memory maps are reopened rather than copied into other processes
+        state = dict(self.__dict__)
+        state["_arrays"] = {}
+        return state
+
+    def _build(self, key: str, cog_path: str, stat: os.stat_result):
+        array_path = self._array_path(key)
+        tmp_path = f"{array_path}.{os.getpid()}.tmp"
+        with rasterio.open(cog_path) as dataset:
+            if dataset.dtypes[0] != "uint8":
+                raise ValueError(
+                    f"Only uint8 COGs may be cached, got {dataset.dtypes[0]}")
+            array = np.lib.format.open_memmap(tmp_path,
+                                              mode="w+",
+                                              dtype=np.uint8,
+                                              shape=(dataset.height,
+                                                     dataset.width))
+            for _, window in dataset.block_windows(1):
+                (row_start, row_stop), (col_start,
+                                        col_stop) = window.toranges()
+                array[row_start:row_stop,
+                      col_start:col_stop] = dataset.read(1, window=window)
+            block_shape = dataset.block_shapes[0]
+            array.flush()
+            del array
+
+        os.replace(tmp_path, array_path)
+        with open(self._metadata_path(key), "w") as f:
+            json.dump(
+                {
+                    "path": os.path.abspath(cog_path),
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "block_shape": list(block_shape),
+                },
+                f,
+            )
+
+    def _read_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self._array_path(key)):
+            return None
+        try:
+            with open(self._metadata_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _remove(self, key: str):
+        self._arrays.pop(key, None)
+        for path in (self._array_path(key), self._metadata_path(key)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _key(self, cog_path: str) -> str:
+        return hashlib.sha256(
+            os.path.abspath(cog_path).encode()).hexdigest()[:32]
+
+    def _array_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _metadata_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
@@ -0,0 +1,58 @@
+from typing import Dict, List
+
+import numpy as np
+
+from stactools.aafc_landuse.constants import (CLASSIFICATION_COLORS,
+                                              CLASSIFICATION_NAMES,
+                                              CLASSIFICATION_VALUES)
+
+
+def create_palette() -> np.ndarray:
+    """Create an RGBA lookup table of the land use class colors
+
+    Values without a class, including nodata (0), are transparent.
+
+    Returns:
+        np.ndarray: (256, 4) uint8 lookup table indexed by class value
+    """
+    palette = np.zeros((256, 4), dtype=np.uint8)
+    for value, color in CLASSIFICATION_COLORS.items():
+        palette[value] = [int(color[i:i + 2], 16) for i in (1, 3, 5)] + [255]
+    return palette
+
+
+PALETTE = create_palette()
+
+# Band metadata item holding the name of each class, e.g. "CLASS_31=Water"
+CLASS_NAME_TAG = "CLASS_{}"
+
+
+def create_class_name_tags() -> Dict[str, str]:
+    """Create the band metadata items naming each land use class
+
+    GeoTIFFs cannot hold GDAL category names, so the names are written as
+    band metadata, which is kept in the GDAL_METADATA tag of a COG.
+
+    Returns:
+        Dict[str, str]: Class names keyed by "CLASS_<value>"
+    """
+    return {
+        CLASS_NAME_TAG.format(value): name
+        for value, name in CLASSIFICATION_NAMES.items()
+    }
+
+
+def create_classification_classes() -> List[dict]:
+    """Create the classification extension classes of the land use COG
+
+    These match the color table and class names embedded by `cog.create_cog`.
+
+    Returns:
+        List[dict]: "classification:classes" objects
+    """
+    return [{
+        "value": value,
+        "name": CLASSIFICATION_NAMES[value],
+        "description": summary,
+        "color_hint": CLASSIFICATION_COLORS[value][1:].upper(),
+    } for value, summary in CLASSIFICATION_VALUES.items()]
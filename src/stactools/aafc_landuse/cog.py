@@ -1,24 +1,69 @@
 import os
-import re
+from tempfile import TemporaryDirectory
 
+import rasterio
+from rasterio.shutil import copy
 from stactools.core.utils.convert import cogify
 
+from stactools.aafc_landuse.classification import (PALETTE,
+                                                   create_class_name_tags)
+from stactools.aafc_landuse.utils import get_year
 
-def create_cog(source: str, destination: str):
+
+def create_classified_vrt(source: str, destination: str) -> str:
+    """Create a VRT of an AAFC Land Use source .tif with the class color table
+    and class names
+
+    The color table is written with nodata (0) and values without a class
+    transparent, and the class names as "CLASS_<value>" band metadata items
+    (see `classification.create_class_name_tags`).
+
+    Args:
+        source (str): Path to source .tif
+        destination (str): Path to the VRT
+
+    Returns:
+        str: Path to the VRT
+    """
+    copy(source, destination, driver="VRT")
+    with rasterio.open(destination, "r+") as dataset:
+        dataset.write_colormap(
+            1, {value: tuple(rgba)
+                for value, rgba in enumerate(PALETTE)})
+        dataset.set_band_description(1, "Land use class")
+        dataset.update_tags(1, **create_class_name_tags())
+    return destination
+
+
+def create_cog(source: str, destination: str) -> str:
     """Create a COG from an AAFC Land Use source .tif
 
+    The COG embeds the class color table and class names, see
+    `create_classified_vrt`.
+
     Args:
         source (str): Path to source .tif
         destination (str): Destination directory to save the resulting COG
+
+    Returns:
+        str: Path to the COG
     """
     cog_name = os.path.basename(source)[:-4] + "_cog.tif"
     cog_destination = os.path.join(destination, cog_name)
 
     # Ensure a year can be extracted from the path
-    match = re.search(r"LU\d{4}", cog_name)
-    if not match:
+    if get_year(cog_name) is None:
         raise ValueError(
             "The source .tif should originate from the source AAFC " +
             "data so a year may be extracted from the name")
 
-    cogify(source, cog_destination, ["-co", "compress=LZW"])
+    # The VRT is written elsewhere, so local sources need an absolute path
+    if os.path.exists(source):
+        source = os.path.abspath(source)
+
+    with TemporaryDirectory() as tmp_dir:
+        vrt = create_classified_vrt(
+            source, os.path.join(tmp_dir, cog_name[:-4] + ".vrt"))
+        cogify(vrt, cog_destination, ["-co", "compress=LZW"])
+
+    return cog_destination
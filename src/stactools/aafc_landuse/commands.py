@@ -1,10 +1,16 @@
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 
 import click
+import pystac
 
-from stactools.aafc_landuse import cog, stac
-from stactools.aafc_landuse.constants import METADATA_URL, THUMBNAIL_URL
+from stactools.aafc_landuse import (block_cache, cog, hotspots, mosaic,
+                                    preview, remote_cache, sharding, stac,
+                                    summary, verify)
+from stactools.aafc_landuse.constants import (HOTSPOT_DESCRIPTION,
+                                              METADATA_URL, THUMBNAIL_URL)
 
 logger = logging.getLogger(__name__)
 
@@ -48,7 +54,9 @@ def create_aafclanduse_command(cli):
     @click.option(
         "-m",
         "--metadata",
-        help="URL to the AAFC metadata json",
+        help=("URL or path to the AAFC metadata json, also required with "
+              "--items for the title, description, license and provider. "
+              "Use a local copy to avoid a network request."),
         default=METADATA_URL,
     )
     @click.option(
@@ -57,20 +65,29 @@ def create_aafclanduse_command(cli):
         help="URL to a collection thumbnail",
         default=THUMBNAIL_URL,
     )
+    @click.option(
+        "-i",
+        "--items",
+        help=("A directory of STAC item json files, or an index file listing "
+              "one item href per line, used to compute the extent and "
+              "summaries"),
+    )
     def create_collection_command(destination: str, metadata: str,
-                                  thumbnail: str):
+                                  thumbnail: str, items: Optional[str]):
         """Creates a STAC Collection from AAFC Land Use metadata
 
         Args:
             destination (str): Directory to create the collection json
             metadata (str, optional): Path to json metadata file - provided by AAFC
             thumbnail (str, optional): Path to a thumbnail
+            items (str, optional): Directory or index file of STAC items
 
         Returns:
             Callable
         """
         # Collect the metadata as a dict and create the collection
-        collection = stac.create_collection(metadata, thumbnail)
+        item_hrefs = None if items is None else summary.iter_item_hrefs(items)
+        collection = stac.create_collection(metadata, thumbnail, item_hrefs)
 
         # Set the destination
         output_path = os.path.join(destination, "collection.json")
@@ -99,7 +116,23 @@ def create_aafclanduse_command(cli):
         help="The url to the metadata description.",
         default=METADATA_URL,
     )
-    def create_item_command(cog: str, destination: str, metadata: str):
+    @click.option(
+        "-b",
+        "--block-hashes",
+        help="The block hash json created using the verify command",
+    )
+    @click.option(
+        "--cache-dir",
+        help="A directory to cache remote COG bytes across runs",
+    )
+    @click.option(
+        "--histogram",
+        is_flag=True,
+        help="Count the pixels of each class. This reads the entire COG.",
+    )
+    def create_item_command(cog: str, destination: str, metadata: str,
+                            block_hashes: Optional[str],
+                            cache_dir: Optional[str], histogram: bool):
         """Creates a STAC Item from a cogified AAFC Land Use raster and
         accompanying metadata file.
 
@@ -110,10 +143,20 @@ def create_aafclanduse_command(cli):
             cog (str): Path to an AAFC Land Use tif
             destination (str): Directory where a COG and STAC item json will be created
             metadata (str): Path to a jsonld metadata file - provided by AAFC
+            block_hashes (str, optional): Path to a block hash json
+            cache_dir (str, optional): Directory to cache remote COG bytes
+            histogram (bool): Add a histogram of the classes to the item
         Returns:
             Callable
         """
-        item = stac.create_item(cog, metadata)
+        cog_cache = None
+        if cache_dir is not None:
+            cog_cache = remote_cache.RemoteCogCache(cache_dir)
+        item = stac.create_item(cog,
+                                metadata,
+                                block_hashes_href=block_hashes,
+                                cog_cache=cog_cache,
+                                histogram=histogram)
 
         # Set the href, save, and validate
         output_path = os.path.join(destination,
@@ -123,4 +166,421 @@ def create_aafclanduse_command(cli):
         item.save_object()
         item.validate()
 
+    @aafclanduse.command(
+        "verify",
+        short_help="Verify the pixels of a COG per block",
+    )
+    @click.argument("cog")
+    @click.option("-s", "--source", help="The source .tif of the COG")
+    @click.option(
+        "-b",
+        "--block-hashes",
+        help=("Block hash json. Written when a source is given, "
+              "otherwise the COG is verified against it"),
+    )
+    @click.option(
+        "--block-size",
+        type=int,
+        default=verify.DEFAULT_BLOCK_SIZE,
+        help="The size of the square windows that are hashed",
+    )
+    @click.option(
+        "--threads",
+        type=int,
+        default=verify.DEFAULT_THREADS,
+        help="The number of concurrent readers",
+    )
+    @click.option(
+        "--cache-dir",
+        help="A directory to cache remote COG bytes across runs",
+    )
+    def verify_command(cog: str, source: Optional[str],
+                       block_hashes: Optional[str], block_size: int,
+                       threads: int, cache_dir: Optional[str]):
+        """Verify a COG against its source .tif or stored block hashes
+
+        Args:
+            cog (str): Path to the COG
+            source (str, optional): Path to the source .tif
+            block_hashes (str, optional): Path to a block hash json
+            block_size (int): Size of the square hash windows
+            threads (int): Number of concurrent readers
+            cache_dir (str, optional): Remote COG cache directory
+        """
+        if source is None and block_hashes is None:
+            raise click.UsageError(
+                "Either --source or --block-hashes is required")
+
+        opener = None
+        if cache_dir is not None:
+            opener = remote_cache.RemoteCogCache(cache_dir).open
+        mismatched = verify.verify_cog(cog, source, block_hashes, block_size,
+                                       threads, opener)
+        if mismatched:
+            for key in mismatched:
+                click.echo(f"Mismatched window (row_col): {key}")
+            raise click.ClickException(
+                f"{len(mismatched)} windows of {cog} do not match")
+
+    @aafclanduse.command(
+        "create-mosaics",
+        short_help="Create a VRT and MosaicJSON for each year of items",
+    )
+    @click.argument("items", nargs=-1, required=True)
+    @click.option(
+        "-d",
+        "--destination",
+        required=True,
+        help="The output directory for the mosaics",
+    )
+    @click.option(
+        "-f",
+        "--format",
+        "formats",
+        multiple=True,
+        type=click.Choice(mosaic.MOSAIC_FORMATS),
+        default=mosaic.MOSAIC_FORMATS,
+        help="The mosaic formats to create",
+    )
+    @click.option(
+        "-c",
+        "--collection",
+        help="A collection json to link the mosaics from as assets",
+    )
+    def create_mosaics_command(items: List[str], destination: str,
+                               formats: List[str], collection: Optional[str]):
+        """Creates mosaics of AAFC Land Use item COGs grouped by year
+
+        Args:
+            items (List[str]): Paths to STAC item json files
+            destination (str): Directory to save the mosaics
+            formats (List[str]): Mosaic formats to create
+            collection (str, optional): Path to a collection json to update
+        """
+        mosaics = mosaic.create_mosaics(mosaic.read_items(items), destination,
+                                        formats)
+
+        if collection is not None:
+            stac_collection = pystac.Collection.from_file(collection)
+            for year, mosaic_hrefs in mosaics.items():
+                mosaic.add_mosaic_assets(stac_collection, year, mosaic_hrefs)
+            stac_collection.make_all_asset_hrefs_relative()
+            stac_collection.save_object()
+            stac_collection.validate()
+
+    @aafclanduse.command(
+        "create-cogs",
+        short_help="Creates COGs from a shard of AAFC Land Use .tifs",
+    )
+    @click.argument("sources", nargs=-1, required=True)
+    @click.option(
+        "-d",
+        "--destination",
+        required=True,
+        help="The output directory for the COGs and shard manifest",
+    )
+    @click.option(
+        "-s",
+        "--shard",
+        default="0/1",
+        help="The zero-based shard of the sources to process, as i/N",
+    )
+    def create_cogs_command(sources: List[str], destination: str, shard: str):
+        """Creates COGs from a shard of AAFC Land Use source .tifs and writes
+        a manifest of the shard
+
+        Args:
+            sources (List[str]): Source .tifs
+            destination (str): Output directory for the COGs
+            shard (str): Shard to process, as i/N
+        """
+        index, count = sharding.parse_shard(shard)
+        shard_sources = sharding.select_shard(sources, index, count)
+
+        cogs = [
+            cog.create_cog(source, destination) for source in shard_sources
+        ]
+
+        sharding.write_manifest(
+            sharding.manifest_path(destination, index, count), "cogs", index,
+            count, shard_sources, cogs)
+
+    @aafclanduse.command(
+        "create-items",
+        short_help="Create STAC items from a shard of AAFC Land Use COGs",
+    )
+    @click.argument("cogs", nargs=-1, required=True)
+    @click.option(
+        "-d",
+        "--destination",
+        required=True,
+        help="The output directory for the STAC json and shard manifest",
+    )
+    @click.option(
+        "-m",
+        "--metadata",
+        help="The url to the metadata description.",
+        default=METADATA_URL,
+    )
+    @click.option(
+        "-s",
+        "--shard",
+        default="0/1",
+        help="The zero-based shard of the COGs to process, as i/N",
+    )
+    @click.option(
+        "--histogram",
+        is_flag=True,
+        help="Count the pixels of each class. This reads the entire COGs.",
+    )
+    def create_items_command(cogs: List[str], destination: str, metadata: str,
+                             shard: str, histogram: bool):
+        """Creates STAC Items from a shard of AAFC Land Use COGs and writes a
+        manifest of the shard, including a summary of the items
+
+        Args:
+            cogs (List[str]): Paths to AAFC Land Use COGs
+            destination (str): Directory where the STAC item json are created
+            metadata (str): Path to a jsonld metadata file - provided by AAFC
+            shard (str): Shard to process, as i/N
+            histogram (bool): Add a histogram of the classes to the items
+        """
+        index, count = sharding.parse_shard(shard)
+        shard_cogs = sharding.select_shard(cogs, index, count)
+
+        item_paths = []
+        items_summary = summary.ItemSummary()
+        for cog_href in shard_cogs:
+            item = stac.create_item(cog_href, metadata, histogram=histogram)
+            item_path = os.path.join(destination,
+                                     os.path.basename(cog_href)[:-4] + ".json")
+            item.set_self_href(item_path)
+            item.make_asset_hrefs_relative()
+            item.save_object()
+            item.validate()
+            items_summary.add_item(item.to_dict())
+            item_paths.append(item_path)
+
+        sharding.write_manifest(
+            sharding.manifest_path(destination, index, count), "items", index,
+            count, shard_cogs, item_paths, items_summary)
+
+    @aafclanduse.command(
+        "merge",
+        short_help="Merge the outputs of all shards",
+    )
+    @click.argument("manifests", nargs=-1, required=True)
+    @click.option(
+        "-d",
+        "--destination",
+        required=True,
+        help="The output directory for the merged outputs",
+    )
+    @click.option(
+        "-m",
+        "--metadata",
+        help="URL to the AAFC metadata json",
+        default=METADATA_URL,
+    )
+    @click.option(
+        "-t",
+        "--thumbnail",
+        help="URL to a collection thumbnail",
+        default=THUMBNAIL_URL,
+    )
+    def merge_command(manifests: List[str], destination: str, metadata: str,
+                      thumbnail: str):
+        """Merges the shard manifests of a create-cogs or create-items run
+
+        An index of all outputs is written to "outputs.txt". For items, a
+        collection including all items and a "class_totals.csv" table are
+        also written.
+
+        Args:
+            manifests (List[str]): Paths to the manifests of all shards
+            destination (str): Output directory for the merged outputs
+            metadata (str, optional): Path to json metadata file - provided by AAFC
+            thumbnail (str, optional): Path to a thumbnail
+        """
+        kind, outputs, items_summary = sharding.merge_manifests(manifests)
+
+        sharding.write_output_index(outputs,
+                                    os.path.join(destination, "outputs.txt"))
+
+        if kind != "items":
+            return
+
+        collection = stac.create_collection(metadata, thumbnail)
+        summary.apply_summary(collection, items_summary)
+        for item in mosaic.read_items(outputs):
+            item.make_asset_hrefs_absolute()
+            collection.add_item(item)
+
+        collection.set_self_href(os.path.join(destination, "collection.json"))
+        collection.normalize_hrefs(destination)
+        collection.make_all_asset_hrefs_relative()
+        collection.save()
+        collection.validate_all()
+
+        sharding.write_class_totals(
+            items_summary, os.path.join(destination, "class_totals.csv"))
+
+    @aafclanduse.command(
+        "create-hotspots",
+        short_help="Create a COG and STAC item of land use change hotspots",
+    )
+    @click.argument("cogs", nargs=-1, required=True)
+    @click.option(
+        "-d",
+        "--destination",
+        required=True,
+        help="The output directory for the COG and STAC json",
+    )
+    @click.option(
+        "-f",
+        "--factor",
+        type=int,
+        default=hotspots.DEFAULT_FACTOR,
+        help="The number of 30m pixels along each side of an output cell",
+    )
+    @click.option(
+        "--from",
+        "from_classes",
+        type=int,
+        multiple=True,
+        help="Only count changes from this class (may be repeated)",
+    )
+    @click.option(
+        "--to",
+        "to_classes",
+        type=int,
+        multiple=True,
+        help="Only count changes to this class (may be repeated)",
+    )
+    @click.option(
+        "-p",
+        "--processes",
+        type=int,
+        help="The number of worker processes, defaults to the number of CPUs",
+    )
+    @click.option(
+        "--cache-dir",
+        help=("A directory to cache the decoded pixels of the local COGs "
+              "across runs"),
+    )
+    def create_hotspots_command(cogs: List[str], destination: str, factor: int,
+                                from_classes: List[int], to_classes: List[int],
+                                processes: Optional[int],
+                                cache_dir: Optional[str]):
+        """Creates a COG of the number of land use changes between
+        consecutive years per output cell, and a STAC item for it
+
+        Args:
+            cogs (List[str]): Aligned AAFC Land Use COGs of a region, one per
+                year
+            destination (str): Directory where the COG and STAC item json will
+                be created
+            factor (int): Number of pixels along each side of an output cell
+            from_classes (List[int]): Only count changes from these classes
+            to_classes (List[int]): Only count changes to these classes
+            processes (int, optional): Number of worker processes
+            cache_dir (str, optional): Decoded block cache directory
+        """
+        years = list(hotspots.get_years(cogs))
+        cache = block_cache.DecodedBlockCache(cache_dir) if cache_dir else None
+        cog_path = hotspots.create_hotspot_cog(cogs,
+                                               destination,
+                                               factor,
+                                               from_classes or None,
+                                               to_classes or None,
+                                               processes,
+                                               cache=cache)
+
+        description = HOTSPOT_DESCRIPTION
+        if from_classes or to_classes:
+            description += (f", from classes {list(from_classes) or 'any'}"
+                            f" to classes {list(to_classes) or 'any'}")
+        item = stac.create_hotspot_item(cog_path, years[0], years[-1],
+                                        description)
+
+        item.set_self_href(cog_path[:-4] + ".json")
+        item.make_asset_hrefs_relative()
+        item.save_object()
+        item.validate()
+
+    @aafclanduse.command(
+        "create-previews",
+        short_help="Add thumbnail and overview assets to STAC items",
+    )
+    @click.argument("items", nargs=-1, required=True)
+    @click.option(
+        "-f",
+        "--format",
+        "image_format",
+        type=click.Choice(preview.PREVIEW_FORMATS),
+        default=preview.PNG,
+        help="The image format of the previews",
+    )
+    @click.option(
+        "--thumbnail-size",
+        type=int,
+        default=preview.THUMBNAIL_SIZE,
+        help="The maximum thumbnail height and width",
+    )
+    @click.option(
+        "--overview-size",
+        type=int,
+        default=preview.OVERVIEW_SIZE,
+        help="The maximum overview height and width",
+    )
+    @click.option(
+        "-s",
+        "--shard",
+        default="0/1",
+        help="The zero-based shard of the items to process, as i/N",
+    )
+    @click.option(
+        "--threads",
+        type=int,
+        default=mosaic.DEFAULT_THREADS,
+        help="The number of items rendered concurrently",
+    )
+    @click.option(
+        "--cache-dir",
+        help="A directory to cache remote COG bytes across runs",
+    )
+    def create_previews_command(items: List[str], image_format: str,
+                                thumbnail_size: int, overview_size: int,
+                                shard: str, threads: int,
+                                cache_dir: Optional[str]):
+        """Renders previews of the COGs of STAC items from COG overviews,
+        saves them next to the item json and adds them as assets
+
+        Args:
+            items (List[str]): Paths to STAC item json files
+            image_format (str): Image format of the previews
+            thumbnail_size (int): Maximum thumbnail height and width
+            overview_size (int): Maximum overview height and width
+            shard (str): Shard to process, as i/N
+            threads (int): Number of items rendered concurrently
+            cache_dir (str, optional): Remote COG cache directory
+        """
+        index, count = sharding.parse_shard(shard)
+        opener = None
+        if cache_dir is not None:
+            opener = remote_cache.RemoteCogCache(cache_dir).open
+
+        def create_previews(item_path: str):
+            item = pystac.Item.from_file(item_path)
+            preview.create_previews(item, os.path.dirname(item_path),
+                                    image_format, thumbnail_size,
+                                    overview_size, opener)
+            item.make_asset_hrefs_relative()
+            item.save_object()
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            for _ in executor.map(create_previews,
+                                  sharding.select_shard(items, index, count)):
+                pass
+
     return aafclanduse
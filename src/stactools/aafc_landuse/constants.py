@@ -7,6 +7,10 @@ METADATA_URL = (
 PROVIDER_URL = f"https://open.canada.ca/data/en/dataset/{OPEN_CANADA_ID}"
 THUMBNAIL_URL = "https://aafc-thumbnails.s3.us-west-2.amazonaws.com/aafc_thumbnail.png"
 
+HOTSPOT_DESCRIPTION = (
+    "Number of 30m pixel changes between consecutive years of the AAFC "
+    "Land Use time series in each cell, summed over all pairs of years")
+
 KEYWORDS = [
     "Land Use", "North America", "Canada", "Remote Sensing", "Reflectance",
     "Forest", "Water", "Wetland", "Cropland", "Grassland", "Settlement",
@@ -45,3 +49,33 @@ CLASSIFICATION_VALUES = {
     "Wetland: Wetland with vegetation at or above the surface of the water",
     91: "Other Land: Rock, beaches, ice, barren land",
 }
+
+# Short names of each class in CLASSIFICATION_VALUES
+CLASSIFICATION_NAMES = {
+    value: summary.split(":", 1)[0]
+    for value, summary in CLASSIFICATION_VALUES.items()
+}
+
+# Display colors for each class in CLASSIFICATION_VALUES
+CLASSIFICATION_COLORS = {
+    21: "#cc0000",
+    22: "#ff6666",
+    24: "#996633",
+    25: "#4d4d4d",
+    28: "#ff99cc",
+    29: "#ffcccc",
+    31: "#3366ff",
+    41: "#006600",
+    42: "#336633",
+    43: "#66cc33",
+    44: "#669966",
+    49: "#999933",
+    51: "#ffcc00",
+    52: "#ffff66",
+    61: "#cc9966",
+    62: "#ffcc99",
+    71: "#33cccc",
+    91: "#cccccc",
+}
+
+CLASSIFICATION_EXTENSION = "https://stac-extensions.github.io/classification/v1.0.0/schema.json"  # noqa
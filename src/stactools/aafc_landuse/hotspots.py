@@ -0,0 +1,319 @@
+import logging
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from tempfile import TemporaryDirectory
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import rasterio
+from rasterio.transform import Affine
+from rasterio.windows import Window
+from stactools.core.utils.convert import cogify
+
+from stactools.aafc_landuse.analytics import read_window
+from stactools.aafc_landuse.block_cache import DecodedBlockCache
+from stactools.aafc_landuse.summary import bounded_map
+from stactools.aafc_landuse.utils import get_year
+
+logger = logging.getLogger(__name__)
+
+# 10 x 30m pixels per 300m output cell
+DEFAULT_FACTOR = 10
+# Approximate size of the square windows read by each task
+DEFAULT_WINDOW_SIZE = 2048
+MAX_PENDING_PER_PROCESS = 2
+
+
+def get_years(cog_hrefs: Iterable[str]) -> Dict[int, str]:
+    """Map the years parsed from the names of AAFC Land Use COGs to the COGs
+
+    Args:
+        cog_hrefs (Iterable[str]): Paths to COGs of a single region
+
+    Returns:
+        Dict[int, str]: Paths by year, in chronological order
+    """
+    years: Dict[int, str] = {}
+    for href in cog_hrefs:
+        year = get_year(os.path.basename(href))
+        if year is None:
+            raise ValueError(f"A year could not be parsed from {href}")
+        if year in years:
+            raise ValueError(f"{href} and {years[year]} share the year {year}")
+        years[year] = href
+    return dict(sorted(years.items()))
+
+
+def sort_by_year(cog_hrefs: Iterable[str]) -> List[str]:
+    """Order AAFC Land Use COGs by the year parsed from their names
+
+    Args:
+        cog_hrefs (Iterable[str]): Paths to COGs of a single region
+
+    Returns:
+        List[str]: Paths in chronological order
+    """
+    return list(get_years(cog_hrefs).values())
+
+
+def hotspot_name(first: int,
+                 last: int,
+                 from_classes: Optional[Iterable[int]] = None,
+                 to_classes: Optional[Iterable[int]] = None) -> str:
+    """Name of a hotspot COG and item, which includes the counted transition
+    so filtered runs do not overwrite each other
+
+    Args:
+        first (int): First year
+        last (int): Last year
+        from_classes (Iterable[int], optional): Classes changed from
+        to_classes (Iterable[int], optional): Classes changed to
+
+    Returns:
+        str: e.g. "hotspots_2000_2020" or "hotspots_2000_2020_from_41-42_to_51"
+    """
+    name = f"hotspots_{first}_{last}"
+    if from_classes is not None:
+        name += "_from_" + "-".join(str(c) for c in sorted(set(from_classes)))
+    if to_classes is not None:
+        name += "_to_" + "-".join(str(c) for c in sorted(set(to_classes)))
+    return name
+
+
+def count_changes(previous: np.ndarray,
+                  current: np.ndarray,
+                  from_classes: Optional[Iterable[int]] = None,
+                  to_classes: Optional[Iterable[int]] = None) -> np.ndarray:
+    """Flag the pixels that changed between two years
+
+    Pixels that are nodata (0) in either year are never flagged.
+
+    Args:
+        previous (np.ndarray): Classes of the earlier year
+        current (np.ndarray): Classes of the later year
+        from_classes (Iterable[int], optional): Only count changes from these
+            classes
+        to_classes (Iterable[int], optional): Only count changes to these
+            classes
+
+    Returns:
+        np.ndarray: Boolean array of changed pixels
+    """
+    changed = (previous != current) & (previous != 0) & (current != 0)
+    if from_classes is not None:
+        changed &= np.isin(previous, list(from_classes))
+    if to_classes is not None:
+        changed &= np.isin(current, list(to_classes))
+    return changed
+
+
+def coarsen(counts: np.ndarray, factor: int) -> np.ndarray:
+    """Sum the counts of each `factor` x `factor` block of pixels
+
+    Args:
+        counts (np.ndarray): (height, width) counts
+        factor (int): Number of pixels along each side of an output cell
+
+    Returns:
+        np.ndarray: (ceil(height / factor), ceil(width / factor)) sums
+    """
+    height, width = counts.shape
+    out_height = math.ceil(height / factor)
+    out_width = math.ceil(width / factor)
+    padded = np.zeros((out_height * factor, out_width * factor),
+                      dtype=np.uint32)
+    padded[:height, :width] = counts
+    return padded.reshape(out_height, factor, out_width,
+                          factor).sum(axis=(1, 3), dtype=np.uint32)
+
+
+def count_window_changes(
+        cog_hrefs: List[str],
+        window: Window,
+        factor: int,
+        from_classes: Optional[List[int]] = None,
+        to_classes: Optional[List[int]] = None,
+        cache: Optional[DecodedBlockCache] = None
+) -> Tuple[Window, np.ndarray]:
+    """Count the changes between consecutive years in a window
+
+    Only two years of the window are held in memory at a time.
+
+    Args:
+        cog_hrefs (List[str]): Aligned COGs in chronological order
+        window (Window): Window aligned to the output grid
+        factor (int): Number of pixels along each side of an output cell
+        from_classes (List[int], optional): Only count changes from these
+            classes
+        to_classes (List[int], optional): Only count changes to these classes
+        cache (DecodedBlockCache, optional): Decoded block cache of the COGs
+
+    Returns:
+        Tuple[Window, np.ndarray]: The window in the output grid and its
+        change counts
+    """
+    counts = np.zeros((int(window.height), int(window.width)), dtype=np.uint16)
+    previous = None
+    for href in cog_hrefs:
+        current = read_window(href, window, cache)
+        if previous is not None:
+            counts += count_changes(previous, current, from_classes,
+                                    to_classes)
+        previous = current
+
+    coarse = coarsen(counts, factor)
+    out_window = Window(
+        int(window.col_off) // factor,
+        int(window.row_off) // factor, coarse.shape[1], coarse.shape[0])
+    return out_window, coarse
+
+
+def _count_window_changes(args) -> Tuple[Window, np.ndarray]:
+    return count_window_changes(*args)
+
+
+def iter_windows(width: int, height: int, size: int) -> Iterator[Window]:
+    """Iterate over the square windows covering a raster
+
+    Args:
+        width (int): Raster width
+        height (int): Raster height
+        size (int): Window size
+
+    Yields:
+        Window: Windows in row-major order
+    """
+    for row_off in range(0, height, size):
+        for col_off in range(0, width, size):
+            yield Window(col_off, row_off, min(size, width - col_off),
+                         min(size, height - row_off))
+
+
+def compute_hotspots(cog_hrefs: Iterable[str],
+                     destination: str,
+                     factor: int = DEFAULT_FACTOR,
+                     from_classes: Optional[Iterable[int]] = None,
+                     to_classes: Optional[Iterable[int]] = None,
+                     processes: Optional[int] = None,
+                     window_size: int = DEFAULT_WINDOW_SIZE,
+                     cache: Optional[DecodedBlockCache] = None):
+    """Count the land use changes between consecutive years per output cell
+    and write them to a GeoTIFF
+
+    Aligned windows of all years are streamed through a process pool, so
+    memory is bounded by the number of processes and the window size.
+
+    Args:
+        cog_hrefs (Iterable[str]): Aligned COGs of a region, one per year
+        destination (str): Path to the output GeoTIFF
+        factor (int, optional): Number of pixels along each side of an
+            output cell
+        from_classes (Iterable[int], optional): Only count changes from these
+            classes
+        to_classes (Iterable[int], optional): Only count changes to these
+            classes
+        processes (int, optional): Number of worker processes, defaults to
+            the number of CPUs
+        window_size (int, optional): Approximate size of the windows read by
+            each task
+        cache (DecodedBlockCache, optional): Decoded block cache of the local
+            COGs, large enough to hold all years. It is filled before the
+            windows are counted, so the processes only read it.
+    """
+    hrefs = sort_by_year(cog_hrefs)
+    if len(hrefs) < 2:
+        raise ValueError("At least two years are required to find changes")
+
+    with rasterio.open(hrefs[0]) as dataset:
+        profile = dataset.profile
+        for href in hrefs[1:]:
+            with rasterio.open(href) as other:
+                if (other.shape != dataset.shape
+                        or other.transform != dataset.transform
+                        or other.crs != dataset.crs):
+                    raise ValueError(f"{href} is not aligned with {hrefs[0]}")
+
+    if cache is not None:
+        for href in hrefs:
+            cache.get(href)
+
+    width, height = profile["width"], profile["height"]
+    out_width = math.ceil(width / factor)
+    out_height = math.ceil(height / factor)
+
+    # Windows are aligned to the output cells
+    size = max(factor, window_size // factor * factor)
+    tasks = ((hrefs, window, factor,
+              None if from_classes is None else list(from_classes),
+              None if to_classes is None else list(to_classes), cache)
+             for window in iter_windows(width, height, size))
+
+    out_profile = dict(
+        driver="GTiff",
+        width=out_width,
+        height=out_height,
+        count=1,
+        dtype="uint32",
+        crs=profile["crs"],
+        transform=profile["transform"] * Affine.scale(factor),
+        tiled=True,
+        blockxsize=256,
+        blockysize=256,
+        compress="LZW",
+    )
+    processes = processes or os.cpu_count() or 1
+    with rasterio.open(destination, "w", **out_profile) as dst:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            for out_window, coarse in bounded_map(
+                    executor, _count_window_changes, tasks,
+                    processes * MAX_PENDING_PER_PROCESS):
+                dst.write(coarse, 1, window=out_window)
+
+
+def create_hotspot_cog(cog_hrefs: Iterable[str],
+                       destination: str,
+                       factor: int = DEFAULT_FACTOR,
+                       from_classes: Optional[Iterable[int]] = None,
+                       to_classes: Optional[Iterable[int]] = None,
+                       processes: Optional[int] = None,
+                       cache: Optional[DecodedBlockCache] = None) -> str:
+    """Create a COG of the number of land use changes between consecutive
+    years per output cell
+
+    Args:
+        cog_hrefs (Iterable[str]): Aligned COGs of a region, one per year
+        destination (str): Destination directory to save the resulting COG
+        factor (int, optional): Number of pixels along each side of an
+            output cell
+        from_classes (Iterable[int], optional): Only count changes from these
+            classes
+        to_classes (Iterable[int], optional): Only count changes to these
+            classes
+        processes (int, optional): Number of worker processes
+        cache (DecodedBlockCache, optional): Decoded block cache of the local
+            COGs
+
+    Returns:
+        str: Path to the COG, named using `hotspot_name` with a "_cog.tif"
+        suffix
+    """
+    from_classes = None if from_classes is None else list(from_classes)
+    to_classes = None if to_classes is None else list(to_classes)
+    years = get_years(cog_hrefs)
+    hrefs = list(years.values())
+    name = hotspot_name(min(years), max(years), from_classes, to_classes)
+    cog_destination = os.path.join(destination, f"{name}_cog.tif")
+
+    with TemporaryDirectory() as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, "hotspots.tif")
+        compute_hotspots(hrefs,
+                         tmp_path,
+                         factor,
+                         from_classes,
+                         to_classes,
+                         processes,
+                         cache=cache)
+        cogify(tmp_path, cog_destination, ["-co", "compress=LZW"])
+
+    return cog_destination
@@ -0,0 +1,366 @@
+import json
+import logging
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+import fsspec
+import pystac
+from pyproj import CRS
+from pystac.extensions.projection import ProjectionExtension
+from shapely.geometry import shape as geojson_shape
+
+from stactools.aafc_landuse.classification import (PALETTE,
+                                                   create_class_name_tags)
+from stactools.aafc_landuse.utils import get_year
+
+logger = logging.getLogger(__name__)
+
+VRT = "vrt"
+MOSAICJSON = "mosaicjson"
+MOSAIC_FORMATS = [VRT, MOSAICJSON]
+
+VRT_MEDIA_TYPE = "application/xml"
+DEFAULT_THREADS = 16
+
+# COGs are created using the GDAL default block size
+COG_BLOCK_SIZE = 512
+
+# Zoom levels suitable for 30m data
+MOSAICJSON_MINZOOM = 5
+MOSAICJSON_MAXZOOM = 12
+
+
+def read_items(item_hrefs: Iterable[str],
+               threads: int = DEFAULT_THREADS) -> List[pystac.Item]:
+    """Read STAC item json files concurrently
+
+    Args:
+        item_hrefs (Iterable[str]): Paths to STAC item json files
+        threads (int, optional): Number of concurrent readers
+
+    Returns:
+        List[pystac.Item]: Items in the order of `item_hrefs`
+    """
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(pystac.Item.from_file, item_hrefs))
+
+
+def group_items_by_year(
+        items: Iterable[pystac.Item]) -> Dict[int, List[pystac.Item]]:
+    """Group AAFC Land Use items using the year parsed from the item id
+
+    Args:
+        items (Iterable[pystac.Item]): Items created using `stac.create_item`
+
+    Returns:
+        Dict[int, List[pystac.Item]]: Items sorted by id for each year
+    """
+    groups: Dict[int, List[pystac.Item]] = defaultdict(list)
+    for item in items:
+        year = get_year(item.id)
+        if year is None:
+            logger.warning(f"Skipping {item.id}, a year could not be parsed")
+            continue
+        groups[year].append(item)
+
+    return {
+        year: sorted(group, key=lambda item: item.id)
+        for year, group in sorted(groups.items())
+    }
+
+
+def gdal_path(href: str) -> str:
+    """Convert an href to a path that may be opened by GDAL
+
+    Args:
+        href (str): Local path or remote url
+
+    Returns:
+        str: Path using a GDAL virtual file system prefix where required
+    """
+    if href.startswith(("http://", "https://")):
+        return f"/vsicurl/{href}"
+    if href.startswith("s3://"):
+        return f"/vsis3/{href[5:]}"
+    return href
+
+
+def create_vrt(items: List[pystac.Item]) -> str:
+    """Create a GDAL VRT mosaic of item COGs
+
+    The mosaic is built using the projection extension of each item, so no
+    rasters are opened. It carries the class color table and class names of
+    the COGs.
+
+    Args:
+        items (List[pystac.Item]): Items created using `stac.create_item`
+
+    Returns:
+        str: VRT xml
+    """
+    if not items:
+        raise ValueError("At least one item is required to create a VRT")
+
+    tiles: List[Tuple[str, List[float], List[int]]] = []
+    epsgs: Set[int] = set()
+    for item in items:
+        projection = ProjectionExtension.ext(item)
+        if (projection.epsg is None or projection.transform is None
+                or projection.shape is None):
+            raise ValueError(f"Item {item.id} is missing proj:epsg, "
+                             "proj:transform or proj:shape")
+        epsgs.add(projection.epsg)
+        tiles.append((item.assets["landuse"].get_absolute_href()
+                      or item.assets["landuse"].href, projection.transform,
+                      projection.shape))
+
+    if len(epsgs) != 1:
+        raise ValueError(
+            f"Items must share a single EPSG code to create a VRT, got {epsgs}"
+        )
+    epsg = epsgs.pop()
+
+    x_res = tiles[0][1][0]
+    y_res = tiles[0][1][4]
+    if any(t[1][0] != x_res or t[1][4] != y_res for t in tiles):
+        raise ValueError("Items must share a resolution to create a VRT")
+
+    left = min(t[1][2] for t in tiles)
+    top = max(t[1][5] for t in tiles)
+    right = max(t[1][2] + t[2][1] * x_res for t in tiles)
+    bottom = min(t[1][5] + t[2][0] * y_res for t in tiles)
+    width = round((right - left) / x_res)
+    height = round((bottom - top) / y_res)
+
+    dataset = ElementTree.Element("VRTDataset",
+                                  rasterXSize=str(width),
+                                  rasterYSize=str(height))
+    srs = ElementTree.SubElement(dataset,
+                                 "SRS",
+                                 dataAxisToSRSAxisMapping="1,2")
+    srs.text = CRS.from_epsg(epsg).to_wkt()
+    geotransform = ElementTree.SubElement(dataset, "GeoTransform")
+    geotransform.text = ", ".join(
+        repr(float(v)) for v in (left, x_res, 0, top, 0, y_res))
+
+    band = ElementTree.SubElement(dataset,
+                                  "VRTRasterBand",
+                                  dataType="Byte",
+                                  band="1")
+    # The same class names and color table as the COGs
+    metadata = ElementTree.SubElement(band, "Metadata")
+    for key, name in create_class_name_tags().items():
+        ElementTree.SubElement(metadata, "MDI", key=key).text = name
+    ElementTree.SubElement(band, "NoDataValue").text = "0"
+    ElementTree.SubElement(band, "ColorInterp").text = "Palette"
+    color_table = ElementTree.SubElement(band, "ColorTable")
+    for rgba in PALETTE:
+        ElementTree.SubElement(color_table,
+                               "Entry",
+                               c1=str(rgba[0]),
+                               c2=str(rgba[1]),
+                               c3=str(rgba[2]),
+                               c4=str(rgba[3]))
+
+    for href, transform, (tile_height, tile_width) in tiles:
+        source = ElementTree.SubElement(band, "ComplexSource")
+        ElementTree.SubElement(source, "SourceFilename",
+                               relativeToVRT="0").text = gdal_path(href)
+        ElementTree.SubElement(source, "SourceBand").text = "1"
+        ElementTree.SubElement(source,
+                               "SourceProperties",
+                               RasterXSize=str(tile_width),
+                               RasterYSize=str(tile_height),
+                               DataType="Byte",
+                               BlockXSize=str(COG_BLOCK_SIZE),
+                               BlockYSize=str(COG_BLOCK_SIZE))
+        ElementTree.SubElement(source,
+                               "SrcRect",
+                               xOff="0",
+                               yOff="0",
+                               xSize=str(tile_width),
+                               ySize=str(tile_height))
+        ElementTree.SubElement(source,
+                               "DstRect",
+                               xOff=str(round((transform[2] - left) / x_res)),
+                               yOff=str(round((transform[5] - top) / y_res)),
+                               xSize=str(tile_width),
+                               ySize=str(tile_height))
+        ElementTree.SubElement(source, "NODATA").text = "0"
+
+    return ElementTree.tostring(dataset, encoding="unicode")
+
+
+def lon_lat_to_tile(lon: float, lat: float, zoom: int) -> Tuple[int, int]:
+    """Find the web mercator tile containing a point
+
+    Args:
+        lon (float): Longitude
+        lat (float): Latitude
+        zoom (int): Zoom level
+
+    Returns:
+        Tuple[int, int]: Tile x and y
+    """
+    n = 2**zoom
+    lat = max(min(lat, 85.0511287798), -85.0511287798)
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int(
+        (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+
+def tile_to_quadkey(x: int, y: int, zoom: int) -> str:
+    """Create the quadkey of a web mercator tile
+
+    Args:
+        x (int): Tile x
+        y (int): Tile y
+        zoom (int): Zoom level
+
+    Returns:
+        str: Quadkey
+    """
+    digits = []
+    for z in range(zoom, 0, -1):
+        mask = 1 << (z - 1)
+        digits.append(str((1 if x & mask else 0) + (2 if y & mask else 0)))
+    return "".join(digits)
+
+
+def create_mosaicjson(items: List[pystac.Item],
+                      name: str,
+                      minzoom: int = MOSAICJSON_MINZOOM,
+                      maxzoom: int = MOSAICJSON_MAXZOOM) -> dict:
+    """Create a MosaicJSON (0.0.3) document of item COGs
+
+    Tiles are assigned to quadkeys at `minzoom` using the item geometry, so
+    no rasters are opened.
+
+    Args:
+        items (List[pystac.Item]): Items created using `stac.create_item`
+        name (str): Mosaic name
+        minzoom (int, optional): Minimum zoom, also used as the quadkey zoom
+        maxzoom (int, optional): Maximum zoom
+
+    Returns:
+        dict: MosaicJSON document
+    """
+    if not items:
+        raise ValueError("At least one item is required to create a mosaic")
+
+    tiles: Dict[str, List[str]] = defaultdict(list)
+    bounds: Optional[List[float]] = None
+    for item in items:
+        west, south, east, north = geojson_shape(item.geometry).bounds
+        if bounds is None:
+            bounds = [west, south, east, north]
+        else:
+            bounds = [
+                min(bounds[0], west),
+                min(bounds[1], south),
+                max(bounds[2], east),
+                max(bounds[3], north)
+            ]
+
+        href = (item.assets["landuse"].get_absolute_href()
+                or item.assets["landuse"].href)
+        min_x, min_y = lon_lat_to_tile(west, north, minzoom)
+        max_x, max_y = lon_lat_to_tile(east, south, minzoom)
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                tiles[tile_to_quadkey(x, y, minzoom)].append(href)
+
+    assert bounds is not None
+    return {
+        "mosaicjson":
+        "0.0.3",
+        "name":
+        name,
+        "version":
+        "1.0.0",
+        "minzoom":
+        minzoom,
+        "maxzoom":
+        maxzoom,
+        "quadkey_zoom":
+        minzoom,
+        "bounds":
+        bounds,
+        "center": [(bounds[0] + bounds[2]) / 2, (bounds[1] + bounds[3]) / 2,
+                   minzoom],
+        "tiles":
+        dict(sorted(tiles.items())),
+    }
+
+
+def create_mosaics(
+    items: Iterable[pystac.Item],
+    destination: str,
+    formats: Iterable[str] = MOSAIC_FORMATS,
+) -> Dict[int, Dict[str, str]]:
+    """Create a mosaic of the item COGs for each year
+
+    Args:
+        items (Iterable[pystac.Item]): Items created using `stac.create_item`
+        destination (str): Directory to save the mosaics
+        formats (Iterable[str], optional): Any of "vrt" and "mosaicjson"
+
+    Returns:
+        Dict[int, Dict[str, str]]: Mosaic paths by format for each year
+    """
+    formats = list(formats)
+    unknown = set(formats) - set(MOSAIC_FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown mosaic formats: {unknown}")
+
+    mosaics: Dict[int, Dict[str, str]] = {}
+    for year, group in group_items_by_year(items).items():
+        mosaics[year] = {}
+        if VRT in formats:
+            path = os.path.join(destination, f"LU{year}_mosaic.vrt")
+            with fsspec.open(path, "w") as f:
+                f.write(create_vrt(group))
+            mosaics[year][VRT] = path
+        if MOSAICJSON in formats:
+            path = os.path.join(destination, f"LU{year}_mosaic.json")
+            with fsspec.open(path, "w") as f:
+                json.dump(create_mosaicjson(group, f"AAFC Land Use {year}"), f)
+            mosaics[year][MOSAICJSON] = path
+
+    return mosaics
+
+
+def add_mosaic_assets(collection: pystac.Collection, year: int,
+                      mosaic_hrefs: Dict[str, str]):
+    """Link the mosaics of a year from a collection as assets
+
+    Args:
+        collection (pystac.Collection): AAFC Land Use collection
+        year (int): Mosaic year
+        mosaic_hrefs (Dict[str, str]): Mosaic paths by format
+    """
+    if VRT in mosaic_hrefs:
+        collection.add_asset(
+            f"mosaic-{year}-vrt",
+            pystac.Asset(
+                href=mosaic_hrefs[VRT],
+                media_type=VRT_MEDIA_TYPE,
+                roles=["data"],
+                title=f"AAFC Land Use {year} VRT mosaic",
+            ),
+        )
+    if MOSAICJSON in mosaic_hrefs:
+        collection.add_asset(
+            f"mosaic-{year}-mosaicjson",
+            pystac.Asset(
+                href=mosaic_hrefs[MOSAICJSON],
+                media_type=pystac.MediaType.JSON,
+                roles=["data"],
+                title=f"AAFC Land Use {year} MosaicJSON",
+            ),
+        )
@@ -0,0 +1,140 @@
+import math
+import os
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pystac
+import rasterio
+from rasterio.enums import Resampling
+
+from stactools.aafc_landuse.classification import PALETTE
+
+THUMBNAIL_SIZE = 256
+OVERVIEW_SIZE = 1024
+
+PNG = "png"
+WEBP = "webp"
+PREVIEW_FORMATS = [PNG, WEBP]
+PREVIEW_MEDIA_TYPES = {PNG: pystac.MediaType.PNG, WEBP: "image/webp"}
+PREVIEW_DRIVERS: Dict[str, Dict[str, Any]] = {
+    PNG: dict(driver="PNG"),
+    WEBP: dict(driver="WEBP", lossless=True)
+}
+
+
+def preview_shape(height: int, width: int, max_size: int) -> Tuple[int, int]:
+    """Shape of a preview that fits within `max_size` and keeps the aspect
+    ratio of the raster
+
+    Args:
+        height (int): Raster height
+        width (int): Raster width
+        max_size (int): Maximum preview height and width
+
+    Returns:
+        Tuple[int, int]: Preview height and width
+    """
+    scale = min(1.0, max_size / max(height, width))
+    return max(1, round(height * scale)), max(1, round(width * scale))
+
+
+def select_overview_level(height: int, width: int, factors: list,
+                          max_size: int) -> Optional[int]:
+    """Select the smallest overview that is at least as large as a preview
+
+    Args:
+        height (int): Full resolution height
+        width (int): Full resolution width
+        factors (list): Decimation factors of the overviews, ascending
+        max_size (int): Maximum preview height and width
+
+    Returns:
+        int: Overview level, or None if the full resolution is required
+    """
+    out_height, out_width = preview_shape(height, width, max_size)
+    level = None
+    for i, factor in enumerate(factors):
+        if (math.ceil(height / factor) >= out_height
+                and math.ceil(width / factor) >= out_width):
+            level = i
+    return level
+
+
+def render_preview(cog_href: str,
+                   destination: str,
+                   max_size: int = THUMBNAIL_SIZE,
+                   image_format: str = PNG,
+                   opener: Optional[Callable] = None):
+    """Render a colored preview of a land use COG
+
+    Only the smallest overview that is at least as large as the preview is
+    read, so full resolution pixels are never decoded when overviews exist.
+
+    Args:
+        cog_href (str): Path to the COG
+        destination (str): Path to the output image
+        max_size (int, optional): Maximum preview height and width
+        image_format (str, optional): One of "png" or "webp"
+        opener (Callable, optional): rasterio opener used to read the COG,
+            e.g. `RemoteCogCache.open`
+    """
+    with rasterio.open(cog_href, opener=opener) as dataset:
+        height, width = dataset.height, dataset.width
+        level = select_overview_level(height, width, dataset.overviews(1),
+                                      max_size)
+
+    out_shape = preview_shape(height, width, max_size)
+    kwargs = {} if level is None else {"overview_level": level}
+    with rasterio.open(cog_href, opener=opener, **kwargs) as dataset:
+        data = dataset.read(1,
+                            out_shape=out_shape,
+                            resampling=Resampling.nearest)
+
+    rgba = np.moveaxis(PALETTE[data], -1, 0)
+    with rasterio.open(destination,
+                       "w",
+                       width=out_shape[1],
+                       height=out_shape[0],
+                       count=4,
+                       dtype="uint8",
+                       **PREVIEW_DRIVERS[image_format]) as dst:
+        dst.write(rgba)
+
+
+def create_previews(item: pystac.Item,
+                    destination: str,
+                    image_format: str = PNG,
+                    thumbnail_size: int = THUMBNAIL_SIZE,
+                    overview_size: Optional[int] = OVERVIEW_SIZE,
+                    opener: Optional[Callable] = None):
+    """Render a thumbnail and overview of the COG of an item and add them as
+    "thumbnail" and "overview" assets
+
+    Args:
+        item (pystac.Item): Item created using `stac.create_item`
+        destination (str): Directory to save the previews
+        image_format (str, optional): One of "png" or "webp"
+        thumbnail_size (int, optional): Maximum thumbnail height and width
+        overview_size (int, optional): Maximum overview height and width,
+            no overview is rendered if None
+        opener (Callable, optional): rasterio opener used to read the COG
+    """
+    cog_href = (item.assets["landuse"].get_absolute_href()
+                or item.assets["landuse"].href)
+
+    sizes = {"thumbnail": thumbnail_size}
+    if overview_size is not None:
+        sizes["overview"] = overview_size
+
+    for key, size in sizes.items():
+        path = os.path.join(destination, f"{item.id}_{key}.{image_format}")
+        render_preview(cog_href, path, size, image_format, opener)
+        item.add_asset(
+            key,
+            pystac.Asset(
+                href=path,
+                media_type=PREVIEW_MEDIA_TYPES[image_format],
+                roles=[key],
+                title=f"AAFC Land Use item {key}",
+            ),
+        )
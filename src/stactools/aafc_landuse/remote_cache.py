@@ -0,0 +1,376 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import fsspec.core
+
+logger = logging.getLogger(__name__)
+
+# COG headers (IFDs and tile offsets) of AAFC Land Use tiles fit in the
+# first few tens of KiB
+DEFAULT_HEADER_SIZE = 64 * 1024
+DEFAULT_BLOCK_SIZE = 256 * 1024
+DEFAULT_MAX_HEADERS = 512
+# Missing blocks separated by at most this many cached blocks are fetched
+# with a single range request
+DEFAULT_MAX_GAP_BLOCKS = 2
+# Fields of `fs.info` that change when a remote file is re-published
+IDENTITY_FIELDS = [
+    "size", "ETag", "etag", "Content-MD5", "LastModified", "last_modified",
+    "mtime"
+]
+IDENTITY_FILE = "identity.json"
+
+
+class CacheStats:
+    """Hit and miss counters of a `RemoteCogCache`"""
+    def __init__(self) -> None:
+        self.header_hits = 0
+        self.header_misses = 0
+        self.block_hits = 0
+        self.block_misses = 0
+        self.requests = 0
+        self.bytes_fetched = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        """Counters as a dict
+
+        Returns:
+            Dict[str, int]: Counters by name
+        """
+        return dict(vars(self))
+
+
+class RemoteCogCache:
+    """Shared local cache of remote COG bytes read through fsspec
+
+    The first `header_size` bytes of each file are kept in an in-memory
+    least recently used cache. All other bytes are stored on disk in
+    fixed-size blocks that persist between runs. Reads of missing blocks
+    that are close to each other are coalesced into a single range request.
+
+    The stored blocks of a file are dropped when its size, ETag or
+    modification time differ from the ones they were fetched with. The
+    identity of each file is looked up once per cache instance.
+
+    Use `open` as a rasterio opener to read COGs through the cache:
+    `rasterio.open(href, opener=cache.open)`. GDAL then issues one `read` per
+    request, so missing blocks are only coalesced within each request.
+    `read_ranges` coalesces across ranges when several are known up front.
+    """
+    def __init__(self,
+                 cache_dir: str,
+                 block_size: int = DEFAULT_BLOCK_SIZE,
+                 header_size: int = DEFAULT_HEADER_SIZE,
+                 max_headers: int = DEFAULT_MAX_HEADERS,
+                 max_gap_blocks: int = DEFAULT_MAX_GAP_BLOCKS):
+        """
+        Args:
+            cache_dir (str): Directory of the persistent block store
+            block_size (int, optional): Size of the stored blocks in bytes
+            header_size (int, optional): Number of leading bytes of each file
+                kept in memory
+            max_headers (int, optional): Number of headers kept in memory
+            max_gap_blocks (int, optional): Largest number of blocks between
+                two missing blocks fetched in the same request
+        """
+        self.cache_dir = cache_dir
+        self.block_size = block_size
+        self.header_size = header_size
+        self.max_headers = max_headers
+        self.max_gap_blocks = max_gap_blocks
+        self.stats = CacheStats()
+        self._headers: "OrderedDict[str, bytes]" = OrderedDict()
+        self._identities: Dict[str, Dict[str, Any]] = {}
+        self._href_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def identity(self, href: str) -> Dict[str, Any]:
+        """Size, ETag and modification time of a remote file, as available
+
+        The first lookup of a file drops its stored blocks if they were
+        fetched from a different version of the file.
+
+        Args:
+            href (str): Remote file href
+
+        Returns:
+            Dict[str, Any]: Identity fields of `fs.info`
+        """
+        with self._lock:
+            identity = self._identities.get(href)
+            if identity is not None:
+                return identity
+            href_lock = self._href_locks.setdefault(href, threading.Lock())
+
+        # Only one thread looks up and validates each file
+        with href_lock:
+            with self._lock:
+                identity = self._identities.get(href)
+            if identity is None:
+                fs, path = fsspec.core.url_to_fs(href)
+                info = fs.info(path)
+                identity = {
+                    field: info[field] if field == "size" else str(info[field])
+                    for field in IDENTITY_FIELDS if info.get(field) is not None
+                }
+                self._validate_blocks(href, identity)
+                with self._lock:
+                    self._identities[href] = identity
+        return identity
+
+    def size(self, href: str) -> int:
+        """Size of a remote file in bytes
+
+        Args:
+            href (str): Remote file href
+
+        Returns:
+            int: File size
+        """
+        return int(self.identity(href)["size"])
+
+    def read(self, href: str, start: int, end: int) -> bytes:
+        """Read a byte range of a remote file
+
+        Args:
+            href (str): Remote file href
+            start (int): First byte
+            end (int): Byte after the last byte
+
+        Returns:
+            bytes: File contents from `start` to `end`
+        """
+        return self.read_ranges(href, [(start, end)])[0]
+
+    def read_ranges(self, href: str, ranges: List[Tuple[int,
+                                                        int]]) -> List[bytes]:
+        """Read several byte ranges of a remote file, fetching the missing
+        blocks of all ranges with as few range requests as possible
+
+        Args:
+            href (str): Remote file href
+            ranges (List[Tuple[int, int]]): (start, end) byte ranges
+
+        Returns:
+            List[bytes]: File contents for each range
+        """
+        file_size = self.size(href)
+        ranges = [(max(0, start), min(end, file_size))
+                  for start, end in ranges]
+
+        header: Optional[bytes] = None
+        if any(start < self.header_size for start, end in ranges if end > 0):
+            header = self._read_header(href, file_size)
+
+        indices: Set[int] = set()
+        for start, end in ranges:
+            start = max(start, self.header_size)
+            if start < end:
+                indices.update(
+                    range(start // self.block_size,
+                          (end - 1) // self.block_size + 1))
+        blocks = self._read_blocks(href, sorted(indices), file_size)
+
+        results = []
+        for start, end in ranges:
+            parts = []
+            position = start
+            while position < end:
+                if position < self.header_size:
+                    assert header is not None
+                    stop = min(end, self.header_size)
+                    parts.append(header[position:stop])
+                else:
+                    index = position // self.block_size
+                    offset = index * self.block_size
+                    stop = min(end, offset + self.block_size)
+                    parts.append(blocks[index][position - offset:stop -
+                                               offset])
+                position = stop
+            results.append(b"".join(parts))
+
+        return results
+
+    def open(self, href: str, mode: str = "rb") -> "CachedRemoteFile":
+        """Open a remote file for reading through the cache
+
+        Args:
+            href (str): Remote file href
+            mode (str, optional): Only "r" and "rb" are supported
+
+        Returns:
+            CachedRemoteFile: Seekable binary file-like object
+        """
+        if mode not in ("r", "rb"):
+            raise ValueError(f"Remote COGs may only be read, got mode {mode}")
+        return CachedRemoteFile(self, href)
+
+    def _read_header(self, href: str, file_size: int) -> bytes:
+        with self._lock:
+            header = self._headers.get(href)
+            if header is not None:
+                self._headers.move_to_end(href)
+                self.stats.header_hits += 1
+                return header
+            self.stats.header_misses += 1
+
+        header = self._fetch(href, 0, min(self.header_size, file_size))
+        with self._lock:
+            self._headers[href] = header
+            while len(self._headers) > self.max_headers:
+                self._headers.popitem(last=False)
+        return header
+
+    def _read_blocks(self, href: str, indices: List[int],
+                     file_size: int) -> Dict[int, bytes]:
+        block_dir = self._block_dir(href)
+        wanted = set(indices)
+        blocks: Dict[int, bytes] = {}
+        missing = []
+        for index in indices:
+            path = os.path.join(block_dir, str(index))
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    blocks[index] = f.read()
+            else:
+                missing.append(index)
+
+        with self._lock:
+            self.stats.block_hits += len(blocks)
+            self.stats.block_misses += len(missing)
+
+        for first, last in self._coalesce(missing):
+            start = first * self.block_size
+            end = min((last + 1) * self.block_size, file_size)
+            data = self._fetch(href, start, end)
+            for index in range(first, last + 1):
+                offset = (index - first) * self.block_size
+                block = data[offset:offset + self.block_size]
+                self._write_block(os.path.join(block_dir, str(index)), block)
+                if index in wanted:
+                    blocks[index] = block
+
+        return blocks
+
+    def _coalesce(self, indices: List[int]) -> List[Tuple[int, int]]:
+        runs: List[Tuple[int, int]] = []
+        for index in indices:
+            if runs and index - runs[-1][1] <= self.max_gap_blocks + 1:
+                runs[-1] = (runs[-1][0], index)
+            else:
+                runs.append((index, index))
+        return runs
+
+    def _fetch(self, href: str, start: int, end: int) -> bytes:
+        logger.debug(f"Fetching bytes {start}-{end} of {href}")
+        fs, path = fsspec.core.url_to_fs(href)
+        data = fs.cat_file(path, start=start, end=end)
+        with self._lock:
+            self.stats.requests += 1
+            self.stats.bytes_fetched += len(data)
+        return data
+
+    def _write_block(self, path: str, block: bytes):
+        # Write atomically so concurrent readers never see partial blocks
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(block)
+            os.replace(tmp_path, path)
+        except FileNotFoundError:
+            # The file changed and another process dropped its blocks
+            logger.debug(f"Not storing {path}, its directory was removed")
+
+    def _validate_blocks(self, href: str, identity: Dict[str, Any]):
+        block_dir = self._block_dir(href)
+        if self._read_identity(block_dir) == identity:
+            return
+
+        suffix = f"{os.getpid()}.{threading.get_ident()}"
+        if os.path.exists(block_dir):
+            logger.info(f"{href} changed, dropping its cached blocks")
+            # Move the stale blocks aside atomically before removing them
+            stale_dir = f"{block_dir}.{suffix}.stale"
+            try:
+                os.rename(block_dir, stale_dir)
+            except FileNotFoundError:
+                pass
+            else:
+                shutil.rmtree(stale_dir, ignore_errors=True)
+
+        # A block directory only appears once its identity is written, so
+        # other processes never see or remove one that is being initialized
+        tmp_dir = f"{block_dir}.{suffix}.tmp"
+        os.makedirs(tmp_dir)
+        with open(os.path.join(tmp_dir, IDENTITY_FILE), "w") as f:
+            json.dump(identity, f)
+        try:
+            os.rename(tmp_dir, block_dir)
+        except OSError:
+            # Another process initialized the directory first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self._validate_blocks(href, identity)
+
+    def _read_identity(self, block_dir: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(block_dir, IDENTITY_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _block_dir(self, href: str) -> str:
+        return os.path.join(self.cache_dir,
+                            hashlib.sha256(href.encode()).hexdigest()[:32])
+
+
+class CachedRemoteFile(io.RawIOBase):
+    """Read-only file-like object of a remote file backed by a
+    `RemoteCogCache`"""
+    def __init__(self, cache: RemoteCogCache, href: str):
+        self.cache = cache
+        self.href = href
+        self._size = cache.size(href)
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        elif whence == io.SEEK_END:
+            self._position = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence {whence}")
+        return self._position
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._size - self._position
+        end = min(self._position + size, self._size)
+        if end <= self._position:
+            return b""
+        data = self.cache.read(self.href, self._position, end)
+        self._position = end
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
@@ -0,0 +1,170 @@
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import fsspec
+
+from stactools.aafc_landuse.summary import ItemSummary
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """Parse a shard in the form "i/N"
+
+    Args:
+        shard (str): Zero-based shard index and number of shards, e.g. "0/8"
+
+    Returns:
+        Tuple[int, int]: Shard index and number of shards
+    """
+    try:
+        index, count = (int(v) for v in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"A shard should be in the form i/N, got {shard}")
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(
+            f"A shard index should be between 0 and N - 1, got {shard}")
+    return index, count
+
+
+def select_shard(inputs: Iterable[str], index: int, count: int) -> List[str]:
+    """Select the inputs of a shard
+
+    Inputs are ordered by file name (which includes the AAFC year and tile)
+    and assigned to shards round-robin, so every worker independently
+    selects the same disjoint subsets.
+
+    Args:
+        inputs (Iterable[str]): Input paths
+        index (int): Shard index
+        count (int): Number of shards
+
+    Returns:
+        List[str]: Inputs of the shard
+    """
+    ordered = sorted(set(inputs), key=lambda p: (os.path.basename(p), p))
+    return ordered[index::count]
+
+
+def manifest_path(destination: str, index: int, count: int) -> str:
+    """Path of the manifest of a shard
+
+    Args:
+        destination (str): Output directory of the shard
+        index (int): Shard index
+        count (int): Number of shards
+
+    Returns:
+        str: Manifest path
+    """
+    return os.path.join(destination, f"manifest-{index}-of-{count}.json")
+
+
+def write_manifest(path: str,
+                   kind: str,
+                   index: int,
+                   count: int,
+                   inputs: List[str],
+                   outputs: List[str],
+                   summary: Optional[ItemSummary] = None):
+    """Write the manifest of a completed shard
+
+    Args:
+        path (str): Manifest path
+        kind (str): Kind of outputs, e.g. "cogs" or "items"
+        index (int): Shard index
+        count (int): Number of shards
+        inputs (List[str]): Inputs processed by the shard
+        outputs (List[str]): Outputs written by the shard
+        summary (ItemSummary, optional): Summary of the items of the shard
+    """
+    with fsspec.open(path, "w") as f:
+        json.dump(
+            {
+                "kind": kind,
+                "shard": index,
+                "shards": count,
+                "inputs": inputs,
+                "outputs": outputs,
+                "summary": None if summary is None else summary.to_dict(),
+            },
+            f,
+            indent=2,
+        )
+
+
+def read_manifest(href: str) -> Dict[str, Any]:
+    """Read a manifest written by `write_manifest`
+
+    Args:
+        href (str): Manifest path
+
+    Returns:
+        dict: Manifest contents
+    """
+    with fsspec.open(href) as f:
+        return json.load(f)
+
+
+def merge_manifests(
+        manifest_hrefs: Iterable[str]) -> Tuple[str, List[str], ItemSummary]:
+    """Combine the manifests of all shards of a run
+
+    Args:
+        manifest_hrefs (Iterable[str]): Manifest paths, one per shard
+
+    Returns:
+        Tuple[str, List[str], ItemSummary]: Kind of outputs, the outputs of
+        all shards, and the merged item summary
+    """
+    manifests = [read_manifest(href) for href in manifest_hrefs]
+    if not manifests:
+        raise ValueError("At least one manifest is required to merge")
+
+    kinds = {m["kind"] for m in manifests}
+    counts = {m["shards"] for m in manifests}
+    if len(kinds) != 1 or len(counts) != 1:
+        raise ValueError("Manifests should be from a single run, got kinds "
+                         f"{sorted(kinds)} and shard counts {sorted(counts)}")
+
+    count = counts.pop()
+    indices = [m["shard"] for m in manifests]
+    missing = sorted(set(range(count)) - set(indices))
+    if missing:
+        raise ValueError(f"Manifests of shards {missing} of {count} "
+                         "are missing")
+    if len(indices) != len(set(indices)):
+        raise ValueError("Manifests of a shard are duplicated")
+
+    outputs: List[str] = []
+    summary = ItemSummary()
+    for manifest in sorted(manifests, key=lambda m: m["shard"]):
+        outputs.extend(manifest["outputs"])
+        if manifest["summary"] is not None:
+            summary.merge(ItemSummary.from_dict(manifest["summary"]))
+
+    return kinds.pop(), outputs, summary
+
+
+def write_output_index(outputs: Iterable[str], destination: str):
+    """Write an index of merged outputs, one href per line
+
+    Args:
+        outputs (Iterable[str]): Output hrefs of all shards
+        destination (str): Path to the index, parent directories are created
+    """
+    with fsspec.open(destination, "w") as f:
+        f.writelines(f"{output}\n" for output in outputs)
+
+
+def write_class_totals(summary: ItemSummary, destination: str):
+    """Write the per-class pixel totals of a summary as a csv table
+
+    Args:
+        summary (ItemSummary): Summary of all items
+        destination (str): Path to the output csv
+    """
+    with fsspec.open(destination, "w", newline="") as f:
+        writer = csv.DictWriter(f, ["value", "class", "pixels"])
+        writer.writeheader()
+        writer.writerows(summary.class_total_rows())
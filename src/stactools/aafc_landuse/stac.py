@@ -1,37 +1,51 @@
 import logging
 import os
-import re
 from datetime import datetime, timezone
-from typing import Any, List, Optional
+from typing import Any, Iterable, List, Optional
 
 import fsspec
 import pystac
+import rasterio
 from pystac.extensions.file import FileExtension
 from pystac.extensions.item_assets import AssetDefinition, ItemAssetsExtension
 from pystac.extensions.label import (LabelClasses, LabelExtension, LabelTask,
                                      LabelType)
 from pystac.extensions.projection import ProjectionExtension
-from pystac.extensions.raster import (DataType, RasterBand, RasterExtension,
-                                      Sampling)
+from pystac.extensions.raster import (DataType, Histogram, RasterBand,
+                                      RasterExtension, Sampling)
 from pystac.link import Link
 from pystac.provider import Provider, ProviderRole
 from stactools.core.io import ReadHrefModifier
 
-from stactools.aafc_landuse.constants import (CLASSIFICATION_VALUES, KEYWORDS,
+from stactools.aafc_landuse.analytics import compute_histogram
+from stactools.aafc_landuse.classification import create_classification_classes
+from stactools.aafc_landuse.constants import (CLASSIFICATION_EXTENSION,
+                                              CLASSIFICATION_VALUES,
+                                              HOTSPOT_DESCRIPTION, KEYWORDS,
                                               LANDUSE_ID, METADATA_URL,
                                               PROVIDER_URL, THUMBNAIL_URL)
+from stactools.aafc_landuse.remote_cache import RemoteCogCache
+from stactools.aafc_landuse.summary import apply_summary, summarize_items
 from stactools.aafc_landuse.utils import (bounds_to_geojson, get_metadata,
-                                          get_raster_metadata)
+                                          get_raster_metadata, get_year)
 
 logger = logging.getLogger(__name__)
 
 
-def create_collection(metadata_url: str = METADATA_URL,
-                      thumbnail_url: str = THUMBNAIL_URL) -> pystac.Collection:
+def create_collection(
+        metadata_url: str = METADATA_URL,
+        thumbnail_url: str = THUMBNAIL_URL,
+        item_hrefs: Optional[Iterable[str]] = None) -> pystac.Collection:
     """Create a STAC Collection using AAFC Land Use metadata
 
+    The metadata is always read for the title, description, license and
+    provider, so pass a local copy to avoid a network request.
+
     Args:
         metadata_url (str, optional): Metadata json provided by AAFC
+        item_hrefs (Iterable[str], optional): STAC item json files. When
+            provided, the extent, EPSG codes and class totals are computed
+            from the items rather than the metadata
 
     Returns:
         pystac.Collection: pystac collection object
@@ -148,40 +162,55 @@ def create_collection(metadata_url: str = METADATA_URL,
             "label:properties":
             None,
             "label:classes": [collection_label.label_classes[0].to_dict()],
+            "classification:classes":
+            create_classification_classes(),
             "proj:epsg":
             metadata.epsg,
         }),
     }
+    collection.stac_extensions.append(CLASSIFICATION_EXTENSION)
+
+    if item_hrefs is not None:
+        apply_summary(collection, summarize_items(item_hrefs))
 
     return collection
 
 
-def create_item(
-        cog_href: str,
-        metadata_url: str = METADATA_URL,
-        cog_href_modifier: Optional[ReadHrefModifier] = None) -> pystac.Item:
+def create_item(cog_href: str,
+                metadata_url: str = METADATA_URL,
+                cog_href_modifier: Optional[ReadHrefModifier] = None,
+                block_hashes_href: Optional[str] = None,
+                cog_cache: Optional[RemoteCogCache] = None,
+                histogram: bool = False) -> pystac.Item:
     """Creates a STAC item for land use tiles that have been converted to COGs
 
     Args:
         cog_href (str): Location of associated COG asset
         metadata_url (str, optional): URL for AAFC Land Use metadata json
+        block_hashes_href (str, optional): Location of the COG block hash json
+            created using `verify.verify_cog`
+        cog_cache (RemoteCogCache, optional): Cache used to read the COG
+            header and size
+        histogram (bool, optional): Count the pixels of each class and add
+            them as a raster band histogram. This reads the entire COG,
+            through `cog_cache` if provided.
 
     Returns:
         pystac.Item: STAC Item object.
     """
     metadata = get_metadata(metadata_url)
+    read_href = cog_href_modifier(cog_href) if cog_href_modifier else cog_href
     bbox, transform, shape = get_raster_metadata(
-        cog_href_modifier(cog_href) if cog_href_modifier else cog_href)
+        read_href, cog_cache.open if cog_cache else None)
     extent_geometry = bounds_to_geojson(bbox, metadata.epsg)
 
     # Ensure a year can be retrieved from the path
     cog_id = os.path.basename(cog_href)[:-4]
-    match = re.search(r"LU\d{4}", cog_id)
-    if not match:
+    year = get_year(cog_id)
+    if year is None:
         raise ValueError(
             "The source .tif should originate from a cog created using a source AAFC "
             + "Land Use GeoTiff")
-    year = int(match.group()[2:])
     datetime_start = datetime(year, 1, 1, tzinfo=timezone.utc)
     datetime_end = datetime(year, 12, 31, tzinfo=timezone.utc)
 
@@ -252,12 +281,13 @@ def create_item(
         "summary": summary
     } for value, summary in CLASSIFICATION_VALUES.items()]
     cog_asset_file.values = mapping
-    with fsspec.open(
-            cog_href_modifier(cog_href) if cog_href_modifier else cog_href
-    ) as file:
-        size = file.size
-        if size is not None:
-            cog_asset_file.size = size
+    if cog_cache is not None:
+        cog_asset_file.size = cog_cache.size(read_href)
+    else:
+        with fsspec.open(read_href) as file:
+            size = file.size
+            if size is not None:
+                cog_asset_file.size = size
 
     # Raster Extension
     cog_asset_raster = RasterExtension.ext(cog_asset, add_if_missing=True)
@@ -267,6 +297,9 @@ def create_item(
             sampling=Sampling.AREA,
             data_type=DataType.UINT8,
             spatial_resolution=30,
+            histogram=Histogram.create(**compute_histogram(
+                read_href, opener=cog_cache.open if cog_cache else None))
+            if histogram else None,
         )
     ]
 
@@ -278,4 +311,88 @@ def create_item(
     cog_asset_projection.transform = item_projection.transform
     cog_asset_projection.shape = item_projection.shape
 
+    # Classes of the embedded color table and class names
+    cog_asset.extra_fields[
+        "classification:classes"] = create_classification_classes()
+    item.stac_extensions.append(CLASSIFICATION_EXTENSION)
+
+    # Block hashes used to re-verify the COG without the source
+    if block_hashes_href is not None:
+        item.add_asset(
+            "block-hashes",
+            pystac.Asset(
+                href=block_hashes_href,
+                media_type=pystac.MediaType.JSON,
+                roles=["metadata"],
+                title="AAFC Land Use COG block hashes",
+            ),
+        )
+
+    return item
+
+
+def create_hotspot_item(cog_href: str,
+                        start_year: int,
+                        end_year: int,
+                        description: str = HOTSPOT_DESCRIPTION) -> pystac.Item:
+    """Creates a STAC item for a land use change hotspot COG created using
+    `hotspots.create_hotspot_cog`
+
+    Args:
+        cog_href (str): Location of the hotspot COG
+        start_year (int): First year of the time series
+        end_year (int): Last year of the time series
+        description (str, optional): Description of the counted changes
+
+    Returns:
+        pystac.Item: STAC Item object.
+    """
+    with rasterio.open(cog_href) as dataset:
+        bbox = list(dataset.bounds)
+        transform = list(dataset.transform)
+        shape = [dataset.height, dataset.width]
+        epsg = dataset.crs.to_epsg()
+        resolution = dataset.res[0]
+    extent_geometry = bounds_to_geojson(bbox, epsg)
+
+    datetime_start = datetime(start_year, 1, 1, tzinfo=timezone.utc)
+    datetime_end = datetime(end_year, 12, 31, tzinfo=timezone.utc)
+    item = pystac.Item(
+        id=os.path.basename(cog_href)[:-4],
+        geometry=extent_geometry,
+        bbox=bbox,
+        datetime=datetime_start,
+        properties={
+            "title": f"AAFC Land Use change hotspots {start_year}-{end_year}",
+            "description": description,
+        },
+        stac_extensions=[],
+    )
+    item.common_metadata.start_datetime = datetime_start
+    item.common_metadata.end_datetime = datetime_end
+
+    item_projection = ProjectionExtension.ext(item, add_if_missing=True)
+    item_projection.epsg = epsg
+    item_projection.bbox = bbox
+    item_projection.transform = transform
+    item_projection.shape = shape
+
+    cog_asset = pystac.Asset(
+        href=cog_href,
+        media_type=pystac.MediaType.COG,
+        roles=["data"],
+        title="AAFC Land Use change hotspots COG",
+    )
+    item.add_asset("hotspots", cog_asset)
+
+    cog_asset_raster = RasterExtension.ext(cog_asset, add_if_missing=True)
+    cog_asset_raster.bands = [
+        RasterBand.create(
+            sampling=Sampling.AREA,
+            data_type=DataType.UINT32,
+            spatial_resolution=resolution,
+            unit="changes",
+        )
+    ]
+
     return item
@@ -0,0 +1,319 @@
+import json
+import logging
+import os
+from collections import Counter, deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import (Any, Callable, Deque, Dict, Iterable, Iterator, List,
+                    Optional, Set, TypeVar)
+
+import fsspec
+import pystac
+from pystac.extensions.item_assets import ItemAssetsExtension
+from pystac.extensions.projection import ProjectionExtension
+from pystac.utils import str_to_datetime
+from shapely.geometry import shape as geojson_shape
+
+from stactools.aafc_landuse.constants import CLASSIFICATION_NAMES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THREADS = 16
+MAX_PENDING_PER_THREAD = 4
+DEFAULT_MAX_PENDING = DEFAULT_THREADS * MAX_PENDING_PER_THREAD
+# Collection field of the pixel totals of each class over all items
+CLASS_TOTALS_FIELD = "aafc:class_totals"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class ItemSummary:
+    """Mergeable summary of a set of AAFC Land Use STAC items
+
+    Only the running union of the extents, the EPSG codes and per-class pixel
+    totals are kept, so memory does not grow with the number of items.
+    Nodata pixels are not included in the class totals.
+    """
+    def __init__(self) -> None:
+        self.count = 0
+        self.bbox: Optional[List[float]] = None
+        self.datetime_start: Optional[datetime] = None
+        self.datetime_end: Optional[datetime] = None
+        self.epsgs: Set[int] = set()
+        self.class_totals: Counter = Counter()
+
+    def add_item(self, item: Dict[str, Any]):
+        """Add an item json (as a dict) to the summary
+
+        Args:
+            item (dict): STAC item created using `stac.create_item`
+        """
+        self.count += 1
+        properties = item["properties"]
+
+        west, south, east, north = geojson_shape(item["geometry"]).bounds
+        self._add_bbox([west, south, east, north])
+
+        start = properties.get("start_datetime") or properties.get("datetime")
+        end = properties.get("end_datetime") or properties.get("datetime")
+        if start is not None:
+            self._add_datetimes(str_to_datetime(start), str_to_datetime(end))
+
+        if properties.get("proj:epsg") is not None:
+            self.epsgs.add(properties["proj:epsg"])
+
+        landuse = item.get("assets", {}).get("landuse", {})
+        for band in landuse.get("raster:bands", []):
+            if band.get("histogram"):
+                totals = histogram_to_totals(band["histogram"])
+                # Only classified pixels are aggregated
+                totals.pop(band.get("nodata"), None)
+                self.class_totals.update(totals)
+
+    def merge(self, other: "ItemSummary"):
+        """Merge another summary into this one
+
+        Args:
+            other (ItemSummary): Summary of a different set of items
+        """
+        self.count += other.count
+        if other.bbox is not None:
+            self._add_bbox(other.bbox)
+        if other.datetime_start is not None and other.datetime_end is not None:
+            self._add_datetimes(other.datetime_start, other.datetime_end)
+        self.epsgs |= other.epsgs
+        self.class_totals.update(other.class_totals)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the summary, e.g. to merge it from another process
+
+        Returns:
+            dict: Summary as json-compatible dict
+        """
+        return {
+            "count":
+            self.count,
+            "bbox":
+            self.bbox,
+            "datetime_start":
+            None if self.datetime_start is None else
+            self.datetime_start.isoformat(),
+            "datetime_end":
+            None
+            if self.datetime_end is None else self.datetime_end.isoformat(),
+            "epsgs":
+            sorted(self.epsgs),
+            "class_totals":
+            {str(k): v
+             for k, v in sorted(self.class_totals.items())},
+        }
+
+    def class_total_rows(self) -> List[Dict[str, Any]]:
+        """Pixel totals of every class, including classes without pixels
+
+        Returns:
+            List[dict]: "value", "class" and "pixels" of each class
+        """
+        return [{
+            "value": value,
+            "class": name,
+            "pixels": self.class_totals.get(value, 0)
+        } for value, name in CLASSIFICATION_NAMES.items()]
+
+    @staticmethod
+    def from_dict(d: Dict[str, Any]) -> "ItemSummary":
+        """Deserialize a summary created using `to_dict`
+
+        Args:
+            d (dict): Summary as json-compatible dict
+
+        Returns:
+            ItemSummary: Summary instance
+        """
+        summary = ItemSummary()
+        summary.count = d["count"]
+        summary.bbox = d["bbox"]
+        if d["datetime_start"] is not None:
+            summary.datetime_start = str_to_datetime(d["datetime_start"])
+        if d["datetime_end"] is not None:
+            summary.datetime_end = str_to_datetime(d["datetime_end"])
+        summary.epsgs = set(d["epsgs"])
+        summary.class_totals = Counter(
+            {int(k): v
+             for k, v in d["class_totals"].items()})
+        return summary
+
+    def _add_bbox(self, bbox: List[float]):
+        if self.bbox is None:
+            self.bbox = list(bbox)
+        else:
+            self.bbox = [
+                min(self.bbox[0], bbox[0]),
+                min(self.bbox[1], bbox[1]),
+                max(self.bbox[2], bbox[2]),
+                max(self.bbox[3], bbox[3]),
+            ]
+
+    def _add_datetimes(self, start: datetime, end: datetime):
+        if self.datetime_start is None or start < self.datetime_start:
+            self.datetime_start = start
+        if self.datetime_end is None or end > self.datetime_end:
+            self.datetime_end = end
+
+
+def histogram_to_totals(histogram: Dict[str, Any]) -> Dict[int, int]:
+    """Convert a raster extension histogram to pixel totals per class value
+
+    Only histograms with buckets one value wide can be attributed to
+    classes, e.g. a GDAL histogram with 256 buckets from -0.5 to 255.5 maps
+    to the values 0-255. Wider buckets span several classes, so such
+    histograms are skipped with a warning.
+
+    Args:
+        histogram (dict): Histogram with "count", "min", "max" and "buckets"
+
+    Returns:
+        Dict[int, int]: Non-zero pixel totals by class value, empty if the
+        buckets are not one value wide
+    """
+    width = (histogram["max"] - histogram["min"]) / histogram["count"]
+    if width != 1:
+        logger.warning(f"Skipping a histogram with buckets {width} wide, "
+                       "only buckets of single class values are supported")
+        return {}
+    return {
+        round(histogram["min"] + i + 0.5): total
+        for i, total in enumerate(histogram["buckets"]) if total
+    }
+
+
+def iter_item_hrefs(path: str) -> Iterator[str]:
+    """Iterate over STAC item json files
+
+    Args:
+        path (str): A directory that is searched recursively for json files,
+            or an index file listing one item href per line
+
+    Yields:
+        str: Item hrefs
+    """
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith(".json"):
+                    yield os.path.join(root, name)
+    else:
+        with fsspec.open(path, "r") as f:
+            for line in f:
+                href = line.strip()
+                if href:
+                    yield href
+
+
+def bounded_map(executor: Executor,
+                fn: Callable[[T], R],
+                iterable: Iterable[T],
+                max_pending: int = DEFAULT_MAX_PENDING) -> Iterator[R]:
+    """Map over an iterable concurrently with a bounded number of pending
+    results, so long (or lazy) iterables are streamed
+
+    Args:
+        executor (Executor): Executor running `fn`
+        fn (Callable): Function to map
+        iterable (Iterable): Inputs
+        max_pending (int, optional): Maximum number of submitted inputs
+
+    Yields:
+        Results in the order of the inputs
+    """
+    pending: Deque[Future] = deque()
+    for value in iterable:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, value))
+    while pending:
+        yield pending.popleft().result()
+
+
+def summarize_item_href(href: str) -> ItemSummary:
+    """Summarize a single STAC item json
+
+    Json files that are not STAC items (e.g. a collection) are skipped.
+
+    Args:
+        href (str): Path to a STAC item json
+
+    Returns:
+        ItemSummary: Summary of the item
+    """
+    summary = ItemSummary()
+    with fsspec.open(href) as f:
+        item = json.load(f)
+    if item.get("type") == "Feature":
+        summary.add_item(item)
+    else:
+        logger.debug(f"Skipping {href}, it is not a STAC item")
+    return summary
+
+
+def summarize_items(item_hrefs: Iterable[str],
+                    threads: int = DEFAULT_THREADS) -> ItemSummary:
+    """Summarize STAC item json files concurrently in constant memory
+
+    Args:
+        item_hrefs (Iterable[str]): Paths to STAC item json files
+        threads (int, optional): Number of concurrent readers
+
+    Returns:
+        ItemSummary: Summary of all items
+    """
+    summary = ItemSummary()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for item_summary in bounded_map(executor, summarize_item_href,
+                                        item_hrefs,
+                                        threads * MAX_PENDING_PER_THREAD):
+            summary.merge(item_summary)
+
+    return summary
+
+
+def apply_summary(collection: pystac.Collection, summary: ItemSummary):
+    """Set the extent and summaries of a collection from an item summary
+
+    The pixel totals of each class over all items are written to the
+    "aafc:class_totals" collection field, with the same rows as
+    `sharding.write_class_totals`.
+
+    Args:
+        collection (pystac.Collection): Collection created using
+            `stac.create_collection`
+        summary (ItemSummary): Summary of the published items
+    """
+    if summary.count == 0 or summary.bbox is None:
+        raise ValueError("No items were found to summarize")
+
+    collection.extent = pystac.Extent(
+        pystac.SpatialExtent([summary.bbox]),
+        pystac.TemporalExtent([[summary.datetime_start,
+                                summary.datetime_end]]),
+    )
+
+    collection_proj = ProjectionExtension.summaries(collection,
+                                                    add_if_missing=True)
+    collection_proj.epsg = sorted(summary.epsgs)
+
+    item_assets = ItemAssetsExtension.ext(collection).item_assets
+    landuse = item_assets["landuse"].properties
+    # A single item asset EPSG code only applies if all items share it
+    if len(summary.epsgs) == 1:
+        landuse["proj:epsg"] = next(iter(summary.epsgs))
+    else:
+        landuse.pop("proj:epsg", None)
+
+    ItemAssetsExtension.ext(collection).item_assets = item_assets
+
+    # The totals describe all items, so they are not part of item_assets
+    if summary.class_totals:
+        collection.extra_fields[CLASS_TOTALS_FIELD] = summary.class_total_rows(
+        )
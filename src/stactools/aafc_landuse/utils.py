@@ -1,8 +1,9 @@
 import json
 import os
+import re
 from datetime import datetime, timezone
 from types import SimpleNamespace
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 
 import rasterio
 import requests
@@ -86,8 +87,10 @@ def get_metadata(metadata_path: str) -> StacMetadata:
     return stac_metadata
 
 
-def get_raster_metadata(raster_path: str) -> Tuple[list, list, list]:
-    with rasterio.open(raster_path) as dataset:
+def get_raster_metadata(
+        raster_path: str,
+        opener: Optional[Callable] = None) -> Tuple[list, list, list]:
+    with rasterio.open(raster_path, opener=opener) as dataset:
         bbox = list(dataset.bounds)
         transform = list(dataset.transform)
         shape = [dataset.height, dataset.width]
@@ -101,3 +104,19 @@ def bounds_to_geojson(bbox: list, in_crs: int) -> dict:
                                        always_xy=True)
     bbox = list(transformer.transform_bounds(*bbox))
     return geojson_mapping(geometry.box(*bbox, ccw=True))
+
+
+def get_year(name: str) -> Optional[int]:
+    """Parse the year from an AAFC Land Use file name or item id
+
+    Args:
+        name (str): Name containing the AAFC "LU<year>" prefix,
+            e.g. "LU2000_u22_v3_2021_06_cog"
+
+    Returns:
+        int: The year, or None if it cannot be found
+    """
+    match = re.search(r"LU\d{4}", name)
+    if not match:
+        return None
+    return int(match.group()[2:])
@@ -0,0 +1,239 @@
+import hashlib
+import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import fsspec
+import rasterio
+from rasterio.windows import Window
+
+DEFAULT_BLOCK_SIZE = 512
+DEFAULT_THREADS = 4
+HASH_ALGORITHM = "sha256"
+
+
+def get_shape(href: str, opener: Optional[Callable] = None) -> Tuple[int, int]:
+    """Read the (height, width) of a raster without decoding any pixels
+
+    Args:
+        href (str): Path to a raster
+        opener (Callable, optional): rasterio opener used to read the raster,
+            e.g. `RemoteCogCache.open`
+
+    Returns:
+        Tuple[int, int]: Raster height and width
+    """
+    with rasterio.open(href, opener=opener) as dataset:
+        return dataset.height, dataset.width
+
+
+def window_key(window: Window) -> str:
+    """Create a stable key for a hash window
+
+    Args:
+        window (Window): Window at a block-aligned offset
+
+    Returns:
+        str: Key in the form "<row_off>_<col_off>"
+    """
+    return f"{int(window.row_off)}_{int(window.col_off)}"
+
+
+def hash_block_row(href: str,
+                   row_off: int,
+                   width: int,
+                   height: int,
+                   block_size: int,
+                   opener: Optional[Callable] = None) -> Dict[str, str]:
+    """Hash the decoded pixels of every window in a single row of blocks
+
+    Only one window is held in memory at a time.
+
+    Args:
+        href (str): Path to a raster
+        row_off (int): Row offset of the block row
+        width (int): Raster width
+        height (int): Raster height
+        block_size (int): Size of the square hash windows
+        opener (Callable, optional): rasterio opener used to read the raster
+
+    Returns:
+        Dict[str, str]: Hex digests keyed by window
+    """
+    hashes = {}
+    block_height = min(block_size, height - row_off)
+    with rasterio.open(href, opener=opener) as dataset:
+        for col_off in range(0, width, block_size):
+            window = Window(col_off, row_off, min(block_size, width - col_off),
+                            block_height)
+            data = dataset.read(window=window)
+            digest = hashlib.new(HASH_ALGORITHM)
+            digest.update(f"{data.dtype.str}{data.shape}".encode())
+            digest.update(data.tobytes())
+            hashes[window_key(window)] = digest.hexdigest()
+
+    return hashes
+
+
+def _submit_block_rows(executor: ThreadPoolExecutor,
+                       href: str,
+                       shape: Tuple[int, int],
+                       block_size: int,
+                       opener: Optional[Callable] = None) -> List[Future]:
+    height, width = shape
+    return [
+        executor.submit(hash_block_row, href, row_off, width, height,
+                        block_size, opener)
+        for row_off in range(0, height, block_size)
+    ]
+
+
+def _collect(futures: List[Future]) -> Dict[str, str]:
+    hashes: Dict[str, str] = {}
+    for future in futures:
+        hashes.update(future.result())
+    return hashes
+
+
+def compute_block_hashes(href: str,
+                         block_size: int = DEFAULT_BLOCK_SIZE,
+                         threads: int = DEFAULT_THREADS,
+                         opener: Optional[Callable] = None) -> Dict[str, str]:
+    """Compute content hashes of the decoded pixels of a raster per window
+
+    Args:
+        href (str): Path to a raster
+        block_size (int, optional): Size of the square hash windows
+        threads (int, optional): Number of concurrent readers
+        opener (Callable, optional): rasterio opener used to read the raster
+
+    Returns:
+        Dict[str, str]: Hex digests keyed by window
+    """
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return _collect(
+            _submit_block_rows(executor, href, get_shape(href, opener),
+                               block_size, opener))
+
+
+def write_block_hashes(hashes: Dict[str, str], shape: Tuple[int, int],
+                       block_size: int, destination: str):
+    """Write block hashes to a json sidecar file
+
+    Args:
+        hashes (Dict[str, str]): Hex digests keyed by window
+        shape (Tuple[int, int]): Height and width of the hashed raster
+        block_size (int): Size of the square hash windows
+        destination (str): Path to the output json
+    """
+    with fsspec.open(destination, "w") as f:
+        json.dump(
+            {
+                "algorithm": HASH_ALGORITHM,
+                "block_size": block_size,
+                "shape": list(shape),
+                "hashes": hashes,
+            },
+            f,
+            indent=2,
+        )
+
+
+def read_block_hashes(href: str) -> Dict[str, Any]:
+    """Read a block hash sidecar written by `write_block_hashes`
+
+    Args:
+        href (str): Path to the block hash json
+
+    Returns:
+        dict: Sidecar contents with "algorithm", "block_size", "shape"
+        and "hashes"
+    """
+    with fsspec.open(href) as f:
+        return json.load(f)
+
+
+def compare_block_hashes(expected: Dict[str, str],
+                         actual: Dict[str, str]) -> List[str]:
+    """Find the windows whose hashes differ or are missing from either side
+
+    Args:
+        expected (Dict[str, str]): Reference hex digests keyed by window
+        actual (Dict[str, str]): Hex digests to check keyed by window
+
+    Returns:
+        List[str]: Sorted keys of mismatched windows
+    """
+    keys = set(expected) | set(actual)
+    return sorted(
+        (key for key in keys if expected.get(key) != actual.get(key)),
+        key=lambda key: tuple(int(v) for v in key.split("_")),
+    )
+
+
+def verify_cog(cog_href: str,
+               source_href: Optional[str] = None,
+               block_hashes_href: Optional[str] = None,
+               block_size: int = DEFAULT_BLOCK_SIZE,
+               threads: int = DEFAULT_THREADS,
+               opener: Optional[Callable] = None) -> List[str]:
+    """Verify the decoded pixels of a COG per window
+
+    When a source is provided, the source and the COG are hashed
+    concurrently and, if they match, the COG hashes are written to
+    `block_hashes_href` (if provided) for later re-verification. Without a
+    source, the COG is checked against previously written block hashes, so
+    only the COG is read.
+
+    Args:
+        cog_href (str): Path to the COG
+        source_href (str, optional): Path to the source .tif
+        block_hashes_href (str, optional): Path to a block hash json
+        block_size (int, optional): Size of the square hash windows
+        threads (int, optional): Number of concurrent readers
+        opener (Callable, optional): rasterio opener used to read the COG,
+            e.g. `RemoteCogCache.open`. The source is read directly.
+
+    Returns:
+        List[str]: Keys of mismatched windows, empty if the COG is valid
+    """
+    shape = get_shape(cog_href, opener)
+
+    if source_href is None:
+        if block_hashes_href is None:
+            raise ValueError("Either a source or a block hash file is "
+                             "required to verify a COG")
+        stored = read_block_hashes(block_hashes_href)
+        if stored["algorithm"] != HASH_ALGORITHM:
+            raise ValueError(
+                f"The block hashes use {stored['algorithm']}, not "
+                f"{HASH_ALGORITHM}")
+        # The stored window grid takes precedence so the keys line up
+        block_size = stored["block_size"]
+        if tuple(stored["shape"]) != shape:
+            raise ValueError(
+                f"The COG shape {shape} does not match the stored shape "
+                f"{tuple(stored['shape'])}")
+        return compare_block_hashes(
+            stored["hashes"],
+            compute_block_hashes(cog_href, block_size, threads, opener))
+
+    source_shape = get_shape(source_href)
+    if source_shape != shape:
+        raise ValueError(f"The COG shape {shape} does not match the source "
+                         f"shape {source_shape}")
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        source_futures = _submit_block_rows(executor, source_href, shape,
+                                            block_size)
+        cog_futures = _submit_block_rows(executor, cog_href, shape, block_size,
+                                         opener)
+        source_hashes = _collect(source_futures)
+        cog_hashes = _collect(cog_futures)
+
+    mismatched = compare_block_hashes(source_hashes, cog_hashes)
+    # Only a verified COG becomes the reference for re-verification
+    if block_hashes_href is not None and not mismatched:
+        write_block_hashes(cog_hashes, shape, block_size, block_hashes_href)
+
+    return mismatched
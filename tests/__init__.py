@@ -1,3 +1,69 @@
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import rasterio
+from rasterio.shutil import copy
+from rasterio.transform import from_origin
 from stactools.testing import TestData
 
 test_data = TestData(__file__)
+
+TEST_METADATA = {
+    "title":
+    "Land Use",
+    "notes":
+    "AAFC Land Use test metadata",
+    "organization": {
+        "title": "Agriculture and Agri-Food Canada"
+    },
+    "license_id":
+    "ca-ogl-lgo",
+    "license_title":
+    "Open Government Licence - Canada",
+    "license_url":
+    "https://open.canada.ca/en/open-government-licence-canada",
+    "time_period_coverage_start":
+    "1990-01-01",
+    "time_period_coverage_end":
+    "2020-12-31",
+    "spatial":
+    json.dumps({
+        "type":
+        "Polygon",
+        "coordinates": [[[-141, 41], [-52, 41], [-52, 60], [-141, 60],
+                         [-141, 41]]]
+    }),
+    "reference_system_information":
+    "EPSG:3979",
+}
+
+
+def write_test_metadata(path: str) -> str:
+    """Write a local copy of AAFC metadata so no network access is needed"""
+    with open(path, "w") as f:
+        json.dump(TEST_METADATA, f)
+    return path
+
+
+def write_test_cog(path: str,
+                   data: Optional[np.ndarray] = None,
+                   origin: tuple = (0, 0)) -> str:
+    """Write a small land use COG in EPSG:3979 at 30m"""
+    if data is None:
+        data = np.full((300, 400), 41, dtype=np.uint8)
+    profile = dict(driver="GTiff",
+                   width=data.shape[1],
+                   height=data.shape[0],
+                   count=1,
+                   dtype="uint8",
+                   crs="EPSG:3979",
+                   transform=from_origin(origin[0], origin[1], 30, 30),
+                   nodata=0)
+    source = path[:-4] + "_source.tif"
+    with rasterio.open(source, "w", **profile) as dst:
+        dst.write(data, 1)
+    copy(source, path, driver="COG", compress="LZW")
+    os.remove(source)
+    return path
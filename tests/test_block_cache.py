@@ -0,0 +1,71 @@
+import os
+import time
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import numpy as np
+from rasterio.windows import Window
+
+from stactools.aafc_landuse import analytics
+from stactools.aafc_landuse.block_cache import DecodedBlockCache
+from tests import write_test_cog
+
+
+class DecodedBlockCacheTest(unittest.TestCase):
+    def test_read_window(self):
+        with TemporaryDirectory() as tmp_dir:
+            data = (np.arange(600 * 700) % 18 + 21).astype(np.uint8).reshape(
+                600, 700)
+            cog_path = write_test_cog(
+                os.path.join(tmp_dir, "LU2010_u0_cog.tif"), data)
+            cache = DecodedBlockCache(os.path.join(tmp_dir, "cache"))
+
+            window = Window(500, 100, 150, 450)
+            cached = analytics.read_window(cog_path, window, cache)
+            np.testing.assert_array_equal(
+                cached, analytics.read_window(cog_path, window))
+            np.testing.assert_array_equal(cached, data[100:550, 500:650])
+            self.assertIsInstance(cached.base, np.memmap)
+
+            # The cached histogram looks the COG up once and counts strips
+            with patch.object(cache, "get", wraps=cache.get) as get, \
+                    patch.object(analytics, "HISTOGRAM_ROWS", 256):
+                self.assertEqual(
+                    analytics.compute_histogram(cog_path, cache),
+                    analytics.compute_histogram(cog_path),
+                )
+            get.assert_called_once_with(cog_path)
+
+    def test_invalidate_on_change(self):
+        with TemporaryDirectory() as tmp_dir:
+            cog_path = write_test_cog(
+                os.path.join(tmp_dir, "LU2010_u0_cog.tif"))
+            cache = DecodedBlockCache(os.path.join(tmp_dir, "cache"))
+            self.assertEqual(cache.get(cog_path)[0, 0], 41)
+
+            # Ensure the modification time changes
+            time.sleep(0.01)
+            write_test_cog(cog_path, np.full((300, 400), 51, dtype=np.uint8))
+            self.assertEqual(cache.get(cog_path)[0, 0], 51)
+
+    def test_evict(self):
+        with TemporaryDirectory() as tmp_dir:
+            paths = [
+                write_test_cog(os.path.join(tmp_dir, f"LU20{i}0_u0_cog.tif"))
+                for i in range(3)
+            ]
+            # Room for two decoded 300x400 arrays (plus .npy headers)
+            cache = DecodedBlockCache(os.path.join(tmp_dir, "cache"),
+                                      max_bytes=2 * 300 * 400 + 256)
+            for path in paths:
+                cache.get(path)
+                time.sleep(0.01)
+
+            self.assertLessEqual(cache.size(), cache.max_bytes)
+            self.assertEqual(
+                len([
+                    name for name in os.listdir(cache.cache_dir)
+                    if name.endswith(".npy")
+                ]), 2)
+            self.assertEqual(cache.get(paths[0])[0, 0], 41)
@@ -0,0 +1,92 @@
+import os
+import shutil
+import unittest
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+import numpy as np
+import rasterio
+from rasterio.enums import ColorInterp
+from rasterio.shutil import copy
+
+from stactools.aafc_landuse import classification, cog, stac
+from stactools.aafc_landuse.constants import (CLASSIFICATION_COLORS,
+                                              CLASSIFICATION_EXTENSION,
+                                              CLASSIFICATION_VALUES)
+from tests import write_test_cog, write_test_metadata
+
+
+def write_source(directory: str) -> np.ndarray:
+    data = np.full((300, 400), 41, dtype=np.uint8)
+    data[:100] = 31
+    write_test_cog(os.path.join(directory, "LU2010_u0.tif"), data)
+    return data
+
+
+class CogTest(unittest.TestCase):
+    def assert_classified(self, cog_path: str, data: np.ndarray):
+        with rasterio.open(cog_path) as dataset:
+            self.assertEqual(dataset.colorinterp, (ColorInterp.palette, ))
+            colormap = dataset.colormap(1)
+            tags = dataset.tags(1)
+            self.assertEqual(dataset.read(1).tolist(), data.tolist())
+
+        self.assertEqual(colormap[0], (0, 0, 0, 0))
+        self.assertEqual(colormap[31], (0x33, 0x66, 0xff, 255))
+        self.assertEqual(tags["CLASS_31"], "Water")
+        self.assertEqual(tags["CLASS_41"], "Forest")
+        self.assertEqual(
+            len([key for key in tags if key.startswith("CLASS_")]),
+            len(CLASSIFICATION_VALUES))
+
+    def test_palette(self):
+        self.assertEqual(set(CLASSIFICATION_COLORS),
+                         set(CLASSIFICATION_VALUES))
+        self.assertEqual(classification.PALETTE[0].tolist(), [0, 0, 0, 0])
+        self.assertEqual(classification.PALETTE[31].tolist(),
+                         [0x33, 0x66, 0xff, 255])
+
+    def test_create_cog(self):
+        def cogify(infile, outfile, args):
+            # gdal_translate -of COG uses the same driver
+            self.assertTrue(infile.endswith(".vrt"))
+            self.assertEqual(args, ["-co", "compress=LZW"])
+            copy(infile, outfile, driver="COG", compress="LZW")
+
+        with TemporaryDirectory() as tmp_dir:
+            data = write_source(tmp_dir)
+            # The temporary VRT must still find a relative source
+            source = os.path.relpath(os.path.join(tmp_dir, "LU2010_u0.tif"))
+            with patch.object(cog, "cogify", side_effect=cogify) as mock:
+                cog_path = cog.create_cog(source, tmp_dir)
+            mock.assert_called_once()
+            self.assertEqual(cog_path,
+                             os.path.join(tmp_dir, "LU2010_u0_cog.tif"))
+            self.assert_classified(cog_path, data)
+
+    @unittest.skipUnless(shutil.which("gdal_translate"),
+                         "gdal_translate is not installed")
+    def test_create_cog_gdal_translate(self):
+        with TemporaryDirectory() as tmp_dir:
+            data = write_source(tmp_dir)
+            cog_path = cog.create_cog(os.path.join(tmp_dir, "LU2010_u0.tif"),
+                                      tmp_dir)
+            self.assert_classified(cog_path, data)
+
+    def test_item_classification_classes(self):
+        with TemporaryDirectory() as tmp_dir:
+            metadata = write_test_metadata(
+                os.path.join(tmp_dir, "metadata.json"))
+            cog_path = write_test_cog(
+                os.path.join(tmp_dir, "LU2010_u0_cog.tif"))
+            item = stac.create_item(cog_path, metadata)
+
+            self.assertIn(CLASSIFICATION_EXTENSION, item.stac_extensions)
+            classes = {
+                c["value"]: c
+                for c in
+                item.assets["landuse"].extra_fields["classification:classes"]
+            }
+            self.assertEqual(set(classes), set(CLASSIFICATION_VALUES))
+            self.assertEqual(classes[41]["name"], "Forest")
+            self.assertEqual(classes[41]["color_hint"], "006600")
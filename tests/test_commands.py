@@ -4,6 +4,7 @@ from tempfile import TemporaryDirectory
 import pystac
 from stactools.testing import CliTestCase
 
+from stactools.aafc_landuse import sharding
 from stactools.aafc_landuse.commands import create_aafclanduse_command
 from tests import test_data
 
@@ -92,3 +93,29 @@ class CreateItemTest(CliTestCase):
             self.assertIn("labels-raster", asset.roles)
 
             item.validate()
+
+
+class MergeTest(CliTestCase):
+    def create_subcommand_functions(self):
+        return [create_aafclanduse_command]
+
+    def test_merge_into_new_directory(self):
+        with TemporaryDirectory() as tmp_dir:
+            cogs = [f"/data/LU{year}_u0_cog.tif" for year in (2000, 2010)]
+            manifests = []
+            for index in range(2):
+                path = sharding.manifest_path(tmp_dir, index, 2)
+                shard_cogs = sharding.select_shard(cogs, index, 2)
+                sharding.write_manifest(path, "cogs", index, 2, shard_cogs,
+                                        shard_cogs)
+                manifests.append(path)
+
+            destination = os.path.join(tmp_dir, "merged", "cogs")
+            result = self.run_command(
+                ["aafclanduse", "merge", *manifests, "-d", destination])
+            self.assertEqual(result.exit_code,
+                             0,
+                             msg="\n{}".format(result.output))
+
+            with open(os.path.join(destination, "outputs.txt")) as f:
+                self.assertEqual(sorted(f.read().split()), cogs)
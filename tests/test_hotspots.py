@@ -0,0 +1,95 @@
+import os
+import unittest
+from glob import glob
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+
+from stactools.aafc_landuse import hotspots, stac
+from stactools.aafc_landuse.block_cache import DecodedBlockCache
+from tests import write_test_cog
+
+
+class HotspotsTest(unittest.TestCase):
+    def test_compute_hotspots(self):
+        with TemporaryDirectory() as tmp_dir:
+            years = {
+                2000: np.full((250, 300), 41, dtype=np.uint8),
+                2010: np.full((250, 300), 41, dtype=np.uint8),
+                2020: np.full((250, 300), 41, dtype=np.uint8),
+            }
+            # Forest to cropland, then cropland to settlement
+            years[2010][:20, :20] = 51
+            years[2020][:20, :20] = 21
+            # Forest to water in the last output cell (partial)
+            years[2020][245:, 295:] = 31
+            # Nodata is never a change
+            years[2020][100:110, 100:110] = 0
+            cogs = [
+                write_test_cog(os.path.join(tmp_dir, f"LU{year}_u0_cog.tif"),
+                               data) for year, data in years.items()
+            ]
+
+            output = os.path.join(tmp_dir, "hotspots.tif")
+            hotspots.compute_hotspots(reversed(cogs),
+                                      output,
+                                      factor=20,
+                                      processes=2,
+                                      window_size=100)
+            with rasterio.open(output) as dataset:
+                self.assertEqual(dataset.shape, (13, 15))
+                self.assertEqual(dataset.res, (600.0, 600.0))
+                counts = dataset.read(1)
+            self.assertEqual(counts[0, 0], 800)
+            self.assertEqual(counts[12, 14], 25)
+            self.assertEqual(counts.sum(), 825)
+
+            # Counted through a decoded block cache shared by the processes
+            cache = DecodedBlockCache(os.path.join(tmp_dir, "cache"))
+            forest_to_cropland = os.path.join(tmp_dir, "forest.tif")
+            hotspots.compute_hotspots(cogs,
+                                      forest_to_cropland,
+                                      factor=20,
+                                      from_classes=[41, 42],
+                                      to_classes=[51, 52],
+                                      processes=2,
+                                      window_size=100,
+                                      cache=cache)
+            with rasterio.open(forest_to_cropland) as dataset:
+                counts = dataset.read(1)
+            self.assertEqual(counts[0, 0], 400)
+            self.assertEqual(counts.sum(), 400)
+            self.assertEqual(
+                len(glob(os.path.join(tmp_dir, "cache", "*.npy"))), 3)
+
+            item = stac.create_hotspot_item(output, 2000, 2020)
+            self.assertEqual(item.id, "hotspots")
+            # Pixels that changed twice count twice
+            self.assertIn("pixel changes", item.properties["description"])
+            self.assertEqual(item.properties["proj:shape"], [13, 15])
+            self.assertEqual(item.properties["end_datetime"],
+                             "2020-12-31T00:00:00Z")
+            band = item.assets["hotspots"].extra_fields["raster:bands"][0]
+            self.assertEqual(band["spatial_resolution"], 600.0)
+
+    def test_hotspot_name(self):
+        self.assertEqual(hotspots.hotspot_name(2000, 2020),
+                         "hotspots_2000_2020")
+        self.assertEqual(hotspots.hotspot_name(2000, 2020, [42, 41]),
+                         "hotspots_2000_2020_from_41-42")
+        self.assertEqual(hotspots.hotspot_name(2000, 2020, [41], [51, 52]),
+                         "hotspots_2000_2020_from_41_to_51-52")
+
+    def test_requires_aligned_years(self):
+        with TemporaryDirectory() as tmp_dir:
+            cogs = [
+                write_test_cog(os.path.join(tmp_dir, "LU2000_u0_cog.tif")),
+                write_test_cog(os.path.join(tmp_dir, "LU2010_u0_cog.tif"),
+                               origin=(30, 0)),
+            ]
+            with self.assertRaises(ValueError):
+                hotspots.compute_hotspots(
+                    cogs, os.path.join(tmp_dir, "hotspots.tif"))
+            with self.assertRaises(ValueError):
+                hotspots.sort_by_year(cogs + cogs[:1])
@@ -0,0 +1,76 @@
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import pystac
+import rasterio
+from rasterio.enums import ColorInterp
+
+from stactools.aafc_landuse import mosaic, stac
+from tests import write_test_cog, write_test_metadata
+
+
+class MosaicTest(unittest.TestCase):
+    def test_create_mosaics(self):
+        with TemporaryDirectory() as tmp_dir:
+            metadata = write_test_metadata(
+                os.path.join(tmp_dir, "metadata.json"))
+
+            items = []
+            for year in (2000, 2010):
+                for i, origin in enumerate([(0, 0), (12000, -3000)]):
+                    data = np.full((300, 400), 41 + i, dtype=np.uint8)
+                    cog_path = write_test_cog(
+                        os.path.join(tmp_dir, f"LU{year}_u{i}_cog.tif"), data,
+                        origin)
+                    items.append(stac.create_item(cog_path, metadata))
+
+            mosaics = mosaic.create_mosaics(items, tmp_dir)
+            self.assertEqual(list(mosaics), [2000, 2010])
+
+            with rasterio.open(mosaics[2010][mosaic.VRT]) as dataset:
+                self.assertEqual(dataset.crs.to_epsg(), 3979)
+                self.assertEqual(dataset.shape, (400, 800))
+                self.assertEqual(
+                    list(dataset.bounds),
+                    [0.0, -12000.0, 24000.0, 0.0],
+                )
+                data = dataset.read(1)
+                self.assertEqual(data[0, 0], 41)
+                self.assertEqual(data[399, 799], 42)
+                self.assertEqual(data[399, 0], 0)
+                # Paletted like the COGs
+                self.assertEqual(dataset.colorinterp, (ColorInterp.palette, ))
+                self.assertEqual(dataset.colormap(1)[41], (0, 102, 0, 255))
+                self.assertEqual(dataset.colormap(1)[0], (0, 0, 0, 0))
+                self.assertEqual(dataset.tags(1)["CLASS_41"], "Forest")
+
+            with open(mosaics[2000][mosaic.MOSAICJSON]) as f:
+                mosaicjson = json.load(f)
+            self.assertEqual(mosaicjson["mosaicjson"], "0.0.3")
+            hrefs = {
+                href
+                for tile in mosaicjson["tiles"].values() for href in tile
+            }
+            self.assertEqual(
+                hrefs,
+                {
+                    os.path.join(tmp_dir, "LU2000_u0_cog.tif"),
+                    os.path.join(tmp_dir, "LU2000_u1_cog.tif")
+                },
+            )
+
+            collection = pystac.Collection(
+                "test", "test",
+                pystac.Extent(pystac.SpatialExtent([[0, 0, 1, 1]]),
+                              pystac.TemporalExtent([[None, None]])))
+            for year, mosaic_hrefs in mosaics.items():
+                mosaic.add_mosaic_assets(collection, year, mosaic_hrefs)
+            self.assertIn("mosaic-2000-vrt", collection.assets)
+            self.assertIn("mosaic-2010-mosaicjson", collection.assets)
+
+    def test_tile_to_quadkey(self):
+        self.assertEqual(mosaic.tile_to_quadkey(3, 5, 3), "213")
+        self.assertEqual(mosaic.lon_lat_to_tile(0.0, 0.0, 1), (1, 1))
@@ -0,0 +1,55 @@
+import os
+import unittest
+import warnings
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+from rasterio.errors import NotGeoreferencedWarning
+
+from stactools.aafc_landuse import preview, stac
+from stactools.aafc_landuse.classification import PALETTE
+from tests import write_test_cog, write_test_metadata
+
+
+class PreviewTest(unittest.TestCase):
+    def test_select_overview_level(self):
+        # 4000 x 2000 with overviews of 2000, 1000, 500 and 250 pixels wide
+        factors = [2, 4, 8, 16]
+        self.assertEqual(
+            preview.select_overview_level(2000, 4000, factors, 256), 2)
+        self.assertEqual(
+            preview.select_overview_level(2000, 4000, factors, 250), 3)
+        self.assertIsNone(
+            preview.select_overview_level(2000, 4000, factors, 8000))
+        self.assertIsNone(preview.select_overview_level(2000, 4000, [], 256))
+
+    def test_create_previews(self):
+        with TemporaryDirectory() as tmp_dir:
+            data = np.full((1500, 2000), 41, dtype=np.uint8)
+            data[:, 1000:] = 51
+            data[:300, :] = 0
+            cog_path = write_test_cog(
+                os.path.join(tmp_dir, "LU2010_u0_cog.tif"), data)
+            with rasterio.open(cog_path) as dataset:
+                self.assertGreater(len(dataset.overviews(1)), 0)
+
+            metadata = write_test_metadata(
+                os.path.join(tmp_dir, "metadata.json"))
+            item = stac.create_item(cog_path, metadata)
+            preview.create_previews(item, tmp_dir, preview.WEBP)
+
+            self.assertEqual(item.assets["thumbnail"].roles, ["thumbnail"])
+            self.assertEqual(item.assets["overview"].media_type, "image/webp")
+
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", NotGeoreferencedWarning)
+                with rasterio.open(item.assets["thumbnail"].href) as dataset:
+                    self.assertEqual(dataset.shape, (192, 256))
+                    rgba = dataset.read()
+                with rasterio.open(item.assets["overview"].href) as dataset:
+                    self.assertEqual(dataset.shape, (768, 1024))
+
+            self.assertEqual(rgba[:, 0, 0].tolist(), [0, 0, 0, 0])
+            self.assertEqual(rgba[:, -1, 0].tolist(), PALETTE[41].tolist())
+            self.assertEqual(rgba[:, -1, -1].tolist(), PALETTE[51].tolist())
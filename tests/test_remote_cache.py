@@ -0,0 +1,221 @@
+import os
+import re
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+from rasterio.windows import Window
+
+from stactools.aafc_landuse import analytics, preview, stac, verify
+from stactools.aafc_landuse.remote_cache import RemoteCogCache
+from tests import write_test_cog, write_test_metadata
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Serves files with an ETag and support for single byte range
+    requests"""
+    ranges: list = []
+
+    def end_headers(self):
+        path = self.translate_path(self.path)
+        if os.path.isfile(path):
+            self.send_header("ETag", f'"{os.stat(path).st_mtime_ns}"')
+        super().end_headers()
+
+    def send_head(self):
+        match = re.match(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if self.command == "GET" and match:
+            path = self.translate_path(self.path)
+            size = os.path.getsize(path)
+            start = int(match.group(1))
+            end = int(match.group(2)) + 1 if match.group(2) else size
+            end = min(end, size)
+            self.ranges.append((start, end))
+            f = open(path, "rb")
+            f.seek(start)
+            self.send_response(206)
+            self.send_header("Content-Type", "image/tiff")
+            self.send_header("Content-Range",
+                             f"bytes {start}-{end - 1}/{size}")
+            self.send_header("Content-Length", str(end - start))
+            self.end_headers()
+            self._remaining = end - start
+            return f
+        return super().send_head()
+
+    def copyfile(self, source, outputfile):
+        remaining = getattr(self, "_remaining", None)
+        if remaining is None:
+            return super().copyfile(source, outputfile)
+        outputfile.write(source.read(remaining))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RemoteCogCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.serve_dir = os.path.join(self.tmp_dir.name, "serve")
+        os.mkdir(self.serve_dir)
+        RangeRequestHandler.ranges = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0),
+                                          partial(RangeRequestHandler,
+                                                  directory=self.serve_dir))
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+        data = np.random.default_rng(0).integers(21,
+                                                 92, (1200, 1000),
+                                                 dtype=np.uint8)
+        self.data = data
+        write_test_cog(os.path.join(self.serve_dir, "LU2010_u0_cog.tif"), data)
+        self.href = f"{self.base_url}/LU2010_u0_cog.tif"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def test_rasterio_reads_through_cache(self):
+        cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        cache = RemoteCogCache(cache_dir, block_size=16 * 1024)
+        window = Window(100, 600, 300, 300)
+
+        with rasterio.open(self.href, opener=cache.open) as dataset:
+            np.testing.assert_array_equal(dataset.read(1, window=window),
+                                          self.data[600:900, 100:400])
+        requests = cache.stats.requests
+        self.assertGreater(cache.stats.block_misses, 0)
+        self.assertEqual(cache.stats.block_hits, 0)
+
+        # A second read of the same window is served entirely from the cache
+        with rasterio.open(self.href, opener=cache.open) as dataset:
+            dataset.read(1, window=window)
+        self.assertEqual(cache.stats.requests, requests)
+        self.assertGreater(cache.stats.header_hits, 0)
+        self.assertGreater(cache.stats.block_hits, 0)
+
+        # Blocks persist on disk for a new cache instance
+        other = RemoteCogCache(cache_dir, block_size=16 * 1024)
+        with rasterio.open(self.href, opener=other.open) as dataset:
+            dataset.read(1, window=window)
+        self.assertEqual(other.stats.block_misses, 0)
+        self.assertEqual(other.stats.header_misses, 1)
+
+    def test_republished_cog(self):
+        cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        window = Window(0, 0, 1000, 1200)
+        cache = RemoteCogCache(cache_dir, block_size=16 * 1024)
+        with rasterio.open(self.href, opener=cache.open) as dataset:
+            dataset.read(1, window=window)
+
+        # Re-publish different pixels at the same URL
+        data = 112 - self.data
+        path = os.path.join(self.serve_dir, "LU2010_u0_cog.tif")
+        write_test_cog(path, data)
+        os.utime(path, ns=(0, 0))
+
+        other = RemoteCogCache(cache_dir, block_size=16 * 1024)
+        with rasterio.open(self.href, opener=other.open) as dataset:
+            np.testing.assert_array_equal(dataset.read(1, window=window), data)
+        self.assertGreater(other.stats.block_misses, 0)
+
+        # The blocks of the new version are kept
+        again = RemoteCogCache(cache_dir, block_size=16 * 1024)
+        with rasterio.open(self.href, opener=again.open) as dataset:
+            dataset.read(1, window=window)
+        self.assertEqual(again.stats.block_misses, 0)
+
+    def test_concurrent_first_reads(self):
+        with open(os.path.join(self.serve_dir, "LU2010_u0_cog.tif"),
+                  "rb") as f:
+            content = f.read()
+
+        for run in range(20):
+            cache = RemoteCogCache(os.path.join(self.tmp_dir.name,
+                                                f"cache-{run}"),
+                                   block_size=16 * 1024)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(
+                    executor.map(
+                        lambda _: cache.read(self.href, 0, len(content)),
+                        range(8)))
+            self.assertEqual(results, [content] * 8)
+
+    def test_read_ranges_coalesced(self):
+        cache = RemoteCogCache(os.path.join(self.tmp_dir.name, "cache"),
+                               block_size=1024,
+                               header_size=1024,
+                               max_gap_blocks=2)
+        with open(os.path.join(self.serve_dir, "LU2010_u0_cog.tif"),
+                  "rb") as f:
+            content = f.read()
+
+        ranges = [(2048, 2100), (4500, 5000), (20000, 20010)]
+        self.assertEqual(cache.read_ranges(self.href, ranges),
+                         [content[start:end] for start, end in ranges])
+        # Blocks 2 and 4 are fetched together, block 19 separately
+        self.assertEqual(RangeRequestHandler.ranges, [(2048, 5120),
+                                                      (19456, 20480)])
+        self.assertEqual(cache.stats.block_misses, 3)
+
+        self.assertEqual(cache.read(self.href, 2050, 5000), content[2050:5000])
+        self.assertEqual(cache.stats.requests, 2)
+
+    def test_readers_use_cache(self):
+        cache_dir = os.path.join(self.tmp_dir.name, "cache")
+        local_path = os.path.join(self.serve_dir, "LU2010_u0_cog.tif")
+        hashes = os.path.join(self.tmp_dir.name, "hashes.json")
+        verify.write_block_hashes(verify.compute_block_hashes(local_path, 256),
+                                  (1200, 1000), 256, hashes)
+
+        cache = RemoteCogCache(cache_dir, block_size=16 * 1024)
+        self.assertEqual(
+            verify.verify_cog(self.href,
+                              block_hashes_href=hashes,
+                              opener=cache.open), [])
+        self.assertGreater(cache.stats.block_misses, 0)
+
+        # Later readers of the same COG are served from the stored blocks
+        other = RemoteCogCache(cache_dir, block_size=16 * 1024)
+        self.assertEqual(
+            verify.verify_cog(self.href,
+                              block_hashes_href=hashes,
+                              opener=other.open), [])
+        window = Window(100, 600, 300, 300)
+        np.testing.assert_array_equal(
+            analytics.read_window(self.href, window, opener=other.open),
+            self.data[600:900, 100:400])
+        preview.render_preview(self.href,
+                               os.path.join(self.tmp_dir.name, "preview.png"),
+                               opener=other.open)
+        self.assertEqual(other.stats.block_misses, 0)
+        self.assertEqual(other.stats.requests, 1)
+
+    def test_create_item(self):
+        metadata = write_test_metadata(
+            os.path.join(self.tmp_dir.name, "metadata.json"))
+        cache = RemoteCogCache(os.path.join(self.tmp_dir.name, "cache"))
+        item = stac.create_item(self.href, metadata, cog_cache=cache)
+        self.assertEqual(
+            item.assets["landuse"].extra_fields["file:size"],
+            os.path.getsize(os.path.join(self.serve_dir, "LU2010_u0_cog.tif")),
+        )
+        self.assertEqual(item.properties["proj:shape"], [1200, 1000])
+
+        # The histogram is read through the cache
+        item = stac.create_item(self.href,
+                                metadata,
+                                cog_cache=cache,
+                                histogram=True)
+        band = item.assets["landuse"].extra_fields["raster:bands"][0]
+        self.assertEqual(sum(band["histogram"]["buckets"]), 1200 * 1000)
+        self.assertGreater(cache.stats.block_misses, 0)
@@ -0,0 +1,75 @@
+import csv
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+from stactools.aafc_landuse import sharding, stac
+from stactools.aafc_landuse.summary import ItemSummary
+from tests import write_test_cog, write_test_metadata
+
+
+class ShardingTest(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(sharding.parse_shard("2/8"), (2, 8))
+        for shard in ["8/8", "-1/8", "1", "a/b", "0/0"]:
+            with self.assertRaises(ValueError):
+                sharding.parse_shard(shard)
+
+    def test_select_shard(self):
+        inputs = [
+            f"/data/{d}/LU{year}_u{i}.tif"
+            for i, (d, year) in enumerate([("b", 2010), ("a", 2000), (
+                "c", 2020), ("a", 2010), ("b", 1990)])
+        ]
+        shards = [
+            sharding.select_shard(reversed(inputs), i, 3) for i in range(3)
+        ]
+        self.assertEqual(sorted(sum(shards, [])), sorted(inputs))
+        self.assertEqual(shards[0],
+                         ["/data/b/LU1990_u4.tif", "/data/a/LU2010_u3.tif"])
+        self.assertEqual(
+            shards, [sharding.select_shard(inputs, i, 3) for i in range(3)])
+
+    def test_merge_manifests(self):
+        with TemporaryDirectory() as tmp_dir:
+            metadata = write_test_metadata(
+                os.path.join(tmp_dir, "metadata.json"))
+            cogs = [
+                write_test_cog(os.path.join(tmp_dir, f"LU{year}_u0_cog.tif"),
+                               np.full((300, 400), value, dtype=np.uint8))
+                for year, value in [(2000, 41), (2010, 51), (2020, 51)]
+            ]
+
+            manifests = []
+            for index in range(2):
+                shard_cogs = sharding.select_shard(cogs, index, 2)
+                shard_summary = ItemSummary()
+                for cog_path in shard_cogs:
+                    item = stac.create_item(cog_path, metadata, histogram=True)
+                    shard_summary.add_item(item.to_dict())
+                path = sharding.manifest_path(tmp_dir, index, 2)
+                sharding.write_manifest(path, "items", index, 2, shard_cogs,
+                                        shard_cogs, shard_summary)
+                manifests.append(path)
+
+            with self.assertRaises(ValueError):
+                sharding.merge_manifests(manifests[:1])
+
+            kind, outputs, summary = sharding.merge_manifests(manifests)
+            self.assertEqual(kind, "items")
+            self.assertEqual(sorted(outputs), cogs)
+            self.assertEqual(summary.count, 3)
+            self.assertEqual(dict(summary.class_totals), {
+                41: 120000,
+                51: 240000
+            })
+
+            table = os.path.join(tmp_dir, "class_totals.csv")
+            sharding.write_class_totals(summary, table)
+            with open(table) as f:
+                rows = {int(row["value"]): row for row in csv.DictReader(f)}
+            self.assertEqual(rows[41]["class"], "Forest")
+            self.assertEqual(rows[51]["pixels"], "240000")
+            self.assertEqual(rows[91]["pixels"], "0")
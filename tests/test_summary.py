@@ -0,0 +1,125 @@
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+from pystac.utils import datetime_to_str
+
+from stactools.aafc_landuse import stac, summary
+from tests import write_test_cog, write_test_metadata
+
+
+class SummaryTest(unittest.TestCase):
+    def test_create_collection_from_items(self):
+        with TemporaryDirectory() as tmp_dir:
+            metadata = write_test_metadata(
+                os.path.join(tmp_dir, "metadata.json"))
+            item_dir = os.path.join(tmp_dir, "items")
+            os.mkdir(item_dir)
+
+            item_paths = []
+            for year, origin in [(2000, (0, 0)), (2010, (120000, 60000))]:
+                cog_path = write_test_cog(os.path.join(tmp_dir,
+                                                       f"LU{year}_u0_cog.tif"),
+                                          origin=origin)
+                item = stac.create_item(cog_path, metadata)
+                histogram = [0] * 256
+                histogram[0] = 7
+                histogram[41] = 100
+                histogram[51] = year
+                band = item.assets["landuse"].extra_fields["raster:bands"][0]
+                band["histogram"] = {
+                    "count": 256,
+                    "min": -0.5,
+                    "max": 255.5,
+                    "buckets": histogram,
+                }
+                item_path = os.path.join(item_dir, f"{item.id}.json")
+                item.set_self_href(item_path)
+                item.make_asset_hrefs_relative()
+                item.save_object()
+                item_paths.append(item_path)
+
+            # The collection itself is not summarized
+            collection = stac.create_collection(metadata)
+            collection.set_self_href(os.path.join(item_dir, "collection.json"))
+            collection.save_object()
+
+            index = os.path.join(tmp_dir, "index.txt")
+            with open(index, "w") as f:
+                f.write("\n".join(item_paths) + "\n")
+
+            items_summary = summary.summarize_items(
+                summary.iter_item_hrefs(item_dir))
+            self.assertEqual(items_summary.count, 2)
+            self.assertNotIn(0, items_summary.class_totals)
+            self.assertEqual(
+                items_summary.to_dict(),
+                summary.summarize_items(
+                    summary.iter_item_hrefs(index)).to_dict(),
+            )
+            self.assertEqual(
+                items_summary.to_dict(),
+                summary.ItemSummary.from_dict(
+                    items_summary.to_dict()).to_dict(),
+            )
+
+            collection = stac.create_collection(
+                metadata, item_hrefs=summary.iter_item_hrefs(item_dir))
+            extent = collection.extent.to_dict()
+            self.assertEqual(extent["temporal"]["interval"][0], [
+                "2000-01-01T00:00:00Z",
+                datetime_to_str(items_summary.datetime_end)
+            ])
+            self.assertEqual(extent["spatial"]["bbox"][0], items_summary.bbox)
+            self.assertEqual(collection.summaries.to_dict()["proj:epsg"],
+                             [3979])
+
+            # Totals over all items are a collection field, not item_assets
+            item_asset = collection.extra_fields["item_assets"]["landuse"]
+            self.assertNotIn("histogram", item_asset["raster:bands"][0])
+            totals = {
+                row["value"]: row
+                for row in collection.extra_fields[summary.CLASS_TOTALS_FIELD]
+            }
+            self.assertEqual(totals[41]["pixels"], 200)
+            self.assertEqual(totals[51], {
+                "value": 51,
+                "class": "Cropland",
+                "pixels": 4010
+            })
+            self.assertEqual(totals[91]["pixels"], 0)
+            self.assertEqual(item_asset["proj:epsg"], 3979)
+
+            # The item asset EPSG code comes from the items, not the metadata
+            items_summary.epsgs = {2960}
+            summary.apply_summary(collection, items_summary)
+            item_asset = collection.extra_fields["item_assets"]["landuse"]
+            self.assertEqual(item_asset["proj:epsg"], 2960)
+            items_summary.epsgs = {2960, 3979}
+            summary.apply_summary(collection, items_summary)
+            item_asset = collection.extra_fields["item_assets"]["landuse"]
+            self.assertNotIn("proj:epsg", item_asset)
+
+    def test_histogram_to_totals(self):
+        self.assertEqual(
+            summary.histogram_to_totals({
+                "count": 4,
+                "min": 40.5,
+                "max": 44.5,
+                "buckets": [1, 0, 3, 4]
+            }),
+            {
+                41: 1,
+                43: 3,
+                44: 4
+            },
+        )
+        # Buckets spanning several classes cannot be attributed to one
+        with self.assertLogs("stactools.aafc_landuse.summary", "WARNING"):
+            self.assertEqual(
+                summary.histogram_to_totals({
+                    "count": 4,
+                    "min": 20,
+                    "max": 60,
+                    "buckets": [1, 0, 3, 4]
+                }), {})
@@ -0,0 +1,93 @@
+import json
+import os
+import unittest
+from tempfile import TemporaryDirectory
+
+import numpy as np
+import rasterio
+from rasterio.shutil import copy
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from stactools.aafc_landuse import verify
+
+
+def write_source(path: str, width: int = 700, height: int = 600):
+    data = (np.arange(width * height, dtype=np.uint32) % 91).astype(
+        np.uint8).reshape(height, width)
+    profile = dict(driver="GTiff",
+                   width=width,
+                   height=height,
+                   count=1,
+                   dtype="uint8",
+                   crs="EPSG:3979",
+                   transform=from_origin(0, 0, 30, 30),
+                   nodata=0)
+    with rasterio.open(path, "w", **profile) as dst:
+        dst.write(data, 1)
+
+
+class VerifyTest(unittest.TestCase):
+    def test_verify_cog(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, "LU2010_u17_v4_2022_02.tif")
+            cog = os.path.join(tmp_dir, "LU2010_u17_v4_2022_02_cog.tif")
+            hashes = os.path.join(tmp_dir, "hashes.json")
+            write_source(source)
+            copy(source, cog, driver="COG", compress="LZW")
+
+            mismatched = verify.verify_cog(cog,
+                                           source,
+                                           hashes,
+                                           block_size=256,
+                                           threads=2)
+            self.assertEqual(mismatched, [])
+
+            stored = verify.read_block_hashes(hashes)
+            self.assertEqual(stored["block_size"], 256)
+            self.assertEqual(stored["shape"], [600, 700])
+            self.assertEqual(len(stored["hashes"]), 9)
+
+            # Re-verification only reads the COG
+            self.assertEqual(verify.verify_cog(cog, block_hashes_href=hashes),
+                             [])
+
+            # Change a single pixel in the second block row and column
+            changed = os.path.join(tmp_dir, "changed.tif")
+            copy(source, changed, driver="GTiff")
+            with rasterio.open(changed, "r+") as dst:
+                dst.write(np.full((1, 1), 7, dtype=np.uint8),
+                          1,
+                          window=Window(300, 270, 1, 1))
+            copy(changed, cog, driver="COG", compress="LZW")
+
+            self.assertEqual(verify.verify_cog(cog, block_hashes_href=hashes),
+                             ["256_256"])
+            self.assertEqual(verify.verify_cog(cog, source, block_size=256),
+                             ["256_256"])
+
+            # A mismatching COG never becomes the stored reference
+            with open(hashes) as f:
+                reference = f.read()
+            self.assertEqual(
+                verify.verify_cog(cog, source, hashes, block_size=256),
+                ["256_256"])
+            with open(hashes) as f:
+                self.assertEqual(f.read(), reference)
+            new_hashes = os.path.join(tmp_dir, "new_hashes.json")
+            verify.verify_cog(cog, source, new_hashes, block_size=256)
+            self.assertFalse(os.path.exists(new_hashes))
+
+            # Hashes of another algorithm cannot be compared
+            stored["algorithm"] = "md5"
+            with open(new_hashes, "w") as f:
+                json.dump(stored, f)
+            with self.assertRaises(ValueError):
+                verify.verify_cog(cog, block_hashes_href=new_hashes)
+
+    def test_verify_cog_requires_reference(self):
+        with TemporaryDirectory() as tmp_dir:
+            source = os.path.join(tmp_dir, "LU2010_u17_v4_2022_02.tif")
+            write_source(source, 10, 10)
+            with self.assertRaises(ValueError):
+                verify.verify_cog(source)